@@ -704,7 +704,7 @@ async def simple_researcher_node(state: State, config: RunnableConfig) -> Comman
     try:
         from src.tools.bm25_search import bm25_search_tool
         logger.info("正在执行BM25搜索...")
-        search_results = bm25_search_tool.invoke(query, limit=1, include_snippets=True)
+        search_results = await bm25_search_tool.ainvoke(query, limit=1, include_snippets=True)
         logger.info(f"BM25搜索完成，结果长度: {len(str(search_results))}")
         logger.debug(f"BM25搜索结果: {search_results}")
         
@@ -1,23 +1,39 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
+import itertools
 import json
 import logging
-from typing import Annotated, List, cast
+import os
+import secrets
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Any, List, NamedTuple
 from uuid import uuid4
 
+import orjson
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import FileResponse, Response
 from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
 from langgraph.types import Command
 from langgraph.store.memory import InMemoryStore
 from langgraph.checkpoint.mongodb import AsyncMongoDBSaver
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from psycopg_pool import AsyncConnectionPool
+from sse_starlette.sse import EventSourceResponse
 
-from src.config.configuration import get_recursion_limit, get_bool_env, get_str_env
+from src.config.configuration import (
+    get_bool_env,
+    get_int_env,
+    get_recursion_limit,
+    get_str_env,
+)
 from src.config.report_style import ReportStyle
 from src.config.tools import SELECTED_RAG_PROVIDER
 from src.graph.builder import build_graph_with_memory, build_simple_graph_with_memory
@@ -40,34 +56,133 @@ from src.server.chat_request import (
 )
 from src.server.config_request import ConfigResponse
 from src.server.mcp_request import MCPServerMetadataRequest, MCPServerMetadataResponse
-from src.server.mcp_utils import load_mcp_tools
+from src.server.mcp_utils import load_mcp_tools_cached
 from src.server.rag_request import (
     RAGConfigResponse,
     RAGResourceRequest,
     RAGResourcesResponse,
 )
 from src.tools import VolcengineTTS
+from src.tools.bm25_search import close_async_clients
 from src.graph.checkpoint import chat_stream_message
 from src.utils.json_utils import sanitize_args
-from src.utils.request_logger import get_request_logger
+from src.utils.request_logger import fast_now, get_request_logger
 
 logger = logging.getLogger(__name__)
 
 INTERNAL_SERVER_ERROR_DETAIL = "Internal Server Error"
 
+# Upper bound on events waiting to be written to the request log. When the
+# logger falls behind, further events are dropped instead of slowing the stream.
+LOG_QUEUE_MAXSIZE = 512
+
+# Number of trailing intermediate results kept for the response log entry
+MAX_LOGGED_INTERMEDIATE_RESULTS = 20
+
+# When SSE_COALESCE_MS is set, buffered frames are flushed once they reach this
+# size, or straight away for events the client should not wait on.
+SSE_COALESCE_MAX_BYTES = 8 * 1024
+_SSE_FLUSH_NOW_PREFIXES = (
+    "event: tool_calls\n",
+    "event: tool_call_result\n",
+    "event: interrupt\n",
+)
+_SSE_QUEUE_MAXSIZE = 256
+_SSE_END = object()
+
+# Connection options for the Postgres checkpointer pool
+_CHECKPOINT_CONNECTION_KWARGS = {
+    "autocommit": True,
+    "row_factory": "dict_row",
+    "prepare_threshold": 0,
+}
+
+# Message ids only need to be unique within this process, so a random
+# per-process prefix plus a counter replaces a uuid4() per replayed message.
+_MESSAGE_ID_PREFIX = secrets.token_hex(4)
+_message_id_counter = itertools.count()
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class _StreamEvent(NamedTuple):
+    """An SSE frame together with the payload it was serialized from."""
+
+    event_type: str
+    data: dict[str, Any]
+    frame: str
+    # Set for complete (non-chunk) messages whose content is a finished result
+    is_final: bool = False
+
+
+@dataclass(frozen=True)
+class _ServerSettings:
+    """Environment-derived settings that stay fixed for the process lifetime."""
+
+    mcp_enabled: bool
+    checkpoint_saver: bool
+    checkpoint_url: str
+    recursion_limit: int
+    log_tool_call_args: bool
+    sse_coalesce_ms: int
+
+
+@lru_cache(maxsize=1)
+def _get_server_settings() -> _ServerSettings:
+    """Read server settings from the environment once.
+
+    Call ``_get_server_settings.cache_clear()`` to pick up changed variables.
+    """
+    return _ServerSettings(
+        mcp_enabled=get_bool_env("ENABLE_MCP_SERVER_CONFIGURATION", False),
+        checkpoint_saver=get_bool_env("LANGGRAPH_CHECKPOINT_SAVER", False),
+        checkpoint_url=get_str_env("LANGGRAPH_CHECKPOINT_DB_URL", ""),
+        recursion_limit=get_recursion_limit(),
+        log_tool_call_args=get_bool_env("LOG_TOOL_CALL_ARGS", True),
+        sse_coalesce_ms=get_int_env("SSE_COALESCE_MS", 0),
+    )
+
+
+@dataclass
+class _StreamStats:
+    """Per-stream totals, logged once when the stream ends."""
+
+    events: int = 0
+    bytes: int = 0
+    tool_calls: int = 0
+    dropped_log_events: int = 0
+
+    def record(self, event: _StreamEvent) -> None:
+        self.events += 1
+        self.bytes += len(event.frame)
+        if event.event_type == "tool_calls":
+            self.tool_calls += 1
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    # Close the pooled connections opened by the async BM25 tool on this loop
+    await close_async_clients()
+
+
 app = FastAPI(
     title="DeerFlow API",
     description="API for Deer",
     version="0.1.0",
+    lifespan=_lifespan,
 )
 
 # Add CORS middleware
 # It's recommended to load the allowed origins from an environment variable
 # for better security and flexibility across different environments.
 allowed_origins_str = get_str_env("ALLOWED_ORIGINS", "http://localhost:3000")
-allowed_origins = [origin.strip() for origin in allowed_origins_str.split(",")]
+# A frozenset makes CORSMiddleware's per-request origin check a hash lookup
+allowed_origins = frozenset(
+    origin.strip() for origin in allowed_origins_str.split(",") if origin.strip()
+)
 
-logger.info(f"Allowed origins: {allowed_origins}")
+logger.info(f"Allowed origins: {sorted(allowed_origins)}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -79,11 +194,16 @@ app.add_middleware(
 in_memory_store = InMemoryStore()
 graph = build_graph_with_memory()
 simple_graph = build_simple_graph_with_memory()
+# The generation graphs carry no per-request state, so compile them once
+podcast_graph = build_podcast_graph()
+ppt_graph = build_ppt_graph()
+prose_graph = build_prose_graph()
+prompt_enhancer_graph = build_prompt_enhancer_graph()
 
 @app.post("/api/chat/stream")
 async def chat_stream(request: ChatRequest):
     # Check if MCP server configuration is enabled
-    mcp_enabled = get_bool_env("ENABLE_MCP_SERVER_CONFIGURATION", False)
+    mcp_enabled = _get_server_settings().mcp_enabled
 
     # Validate MCP settings if provided
     if request.mcp_settings and not mcp_enabled:
@@ -100,7 +220,8 @@ async def chat_stream(request: ChatRequest):
     
     # 记录请求日志
     request_logger = get_request_logger()
-    messages = request.model_dump()["messages"]
+    # Dump only the messages rather than the whole request model
+    messages = [message.model_dump() for message in request.messages or []]
     user_query = messages[-1]["content"] if messages else ""
     
     request_metadata = {
@@ -121,41 +242,120 @@ async def chat_stream(request: ChatRequest):
         request_metadata=request_metadata,
     )
     
-    return StreamingResponse(
-        _astream_workflow_generator(
-            messages,
-            thread_id,
-            request.resources,
-            request.max_plan_iterations,
-            request.max_step_num,
-            request.max_search_results,
-            request.auto_accepted_plan,
-            request.interrupt_feedback,
-            request.mcp_settings if mcp_enabled else {},
-            request.enable_background_investigation,
-            request.report_style,
-            request.enable_deep_thinking,
-            selected_graph,
-            request_id,
-        ),
-        media_type="text/event-stream",
+    frames = _astream_workflow_generator(
+        messages,
+        thread_id,
+        request.resources,
+        request.max_plan_iterations,
+        request.max_step_num,
+        request.max_search_results,
+        request.auto_accepted_plan,
+        request.interrupt_feedback,
+        request.mcp_settings if mcp_enabled else {},
+        request.enable_background_investigation,
+        request.report_style,
+        request.enable_deep_thinking,
+        selected_graph,
+        request_id,
     )
+    coalesce_ms = _get_server_settings().sse_coalesce_ms
+    if coalesce_ms > 0:
+        frames = _coalesce_frames(frames, coalesce_ms / 1000)
+    return _event_source_response(frames)
+
+
+async def _coalesce_frames(frames, window_seconds: float):
+    """
+    Merge SSE frames produced within a short window into one write.
+
+    The source generator runs in its own task and hands frames over through a
+    bounded queue, so a flush can happen on a timer even while the graph is
+    idle. Buffered frames are flushed once the window since the first of them
+    has elapsed, once SSE_COALESCE_MAX_BYTES is reached, or immediately for
+    tool calls, interrupts and finished messages.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_SSE_QUEUE_MAXSIZE)
+
+    async def produce():
+        try:
+            async for frame in frames:
+                await queue.put(frame)
+        except Exception:
+            # Wake the consumer so it can re-raise the error via `await producer`
+            await queue.put(_SSE_END)
+            raise
+        await queue.put(_SSE_END)
+
+    producer = asyncio.create_task(produce())
+    buffer: list[str] = []
+    buffered_size = 0
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered_size = 0
+                deadline = None
+                continue
+            if frame is _SSE_END:
+                break
+
+            buffer.append(frame)
+            buffered_size += len(frame)
+            if deadline is None:
+                deadline = loop.time() + window_seconds
+            if (
+                buffered_size >= SSE_COALESCE_MAX_BYTES
+                or frame.startswith(_SSE_FLUSH_NOW_PREFIXES)
+                or '"finish_reason":' in frame
+            ):
+                yield "".join(buffer)
+                buffer.clear()
+                buffered_size = 0
+                deadline = None
+
+        if buffer:
+            yield "".join(buffer)
+        # Surface any exception raised by the source generator
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+
+def _event_source_response(frames) -> EventSourceResponse:
+    """
+    Wrap pre-formatted SSE frames in an EventSourceResponse.
+
+    Frames are passed through as bytes so sse-starlette does not re-wrap them,
+    while still getting its keep-alive pings and anti-buffering headers.
+    """
+
+    async def encoded_frames():
+        async for frame in frames:
+            yield frame.encode("utf-8")
+
+    # Use "\n" so ping comments end in "\n\n" like every other frame.
+    return EventSourceResponse(encoded_frames(), sep="\n")
 
 
 def _process_tool_call_chunks(tool_call_chunks):
     """Process tool call chunks and sanitize arguments."""
-    chunks = []
-    for chunk in tool_call_chunks:
-        chunks.append(
-            {
-                "name": chunk.get("name", ""),
-                "args": sanitize_args(chunk.get("args", "")),
-                "id": chunk.get("id", ""),
-                "index": chunk.get("index", 0),
-                "type": chunk.get("type", ""),
-            }
-        )
-    return chunks
+    return [
+        {
+            "name": chunk.get("name", ""),
+            "args": sanitize_args(chunk.get("args", "")),
+            "id": chunk.get("id", ""),
+            "index": chunk.get("index", 0),
+            "type": chunk.get("type", ""),
+        }
+        for chunk in tool_call_chunks
+    ]
 
 
 def _get_agent_name(agent, message_metadata):
@@ -200,7 +400,7 @@ def _create_event_stream_message(
 
 def _create_interrupt_event(thread_id, event_data):
     """Create interrupt event."""
-    return _make_event(
+    return _create_stream_event(
         "interrupt",
         {
             "thread_id": thread_id,
@@ -216,25 +416,37 @@ def _create_interrupt_event(thread_id, event_data):
     )
 
 
-def _process_initial_messages(message, thread_id):
-    """Process initial messages and yield formatted events."""
-    json_data = json.dumps(
-        {
-            "thread_id": thread_id,
-            "id": "run--" + message.get("id", uuid4().hex),
-            "role": "user",
-            "content": message.get("content", ""),
-        },
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
-    chat_stream_message(
-        thread_id, f"event: message_chunk\ndata: {json_data}\n\n", "none"
-    )
+def _next_message_id() -> str:
+    """Return a process-unique id for a replayed message."""
+    return f"{_MESSAGE_ID_PREFIX}{next(_message_id_counter):x}"
+
+
+def _process_initial_messages(messages, thread_id):
+    """Store the initial messages as formatted events in a single write."""
+    frames = []
+    for message in messages:
+        if not isinstance(message, dict) or "content" not in message:
+            continue
+        json_data = _encode_json(
+            {
+                "thread_id": thread_id,
+                "id": "run--" + (message.get("id") or _next_message_id()),
+                "role": "user",
+                "content": message.get("content", ""),
+            }
+        )
+        frames.append(f"event: message_chunk\ndata: {json_data}\n\n")
+    if frames:
+        chat_stream_message(thread_id, "".join(frames), "none")
 
 
-async def _process_message_chunk(message_chunk, message_metadata, thread_id, agent):
-    """Process a single message chunk and yield appropriate events."""
+def _process_message_chunk(
+    message_chunk: BaseMessage,
+    message_metadata: dict[str, Any],
+    thread_id: str,
+    agent,
+) -> _StreamEvent:
+    """Process a single message chunk into the matching stream event."""
     agent_name = _get_agent_name(agent, message_metadata)
     event_stream_message = _create_event_stream_message(
         message_chunk, message_metadata, thread_id, agent_name
@@ -243,32 +455,33 @@ async def _process_message_chunk(message_chunk, message_metadata, thread_id, age
     if isinstance(message_chunk, ToolMessage):
         # Tool Message - Return the result of the tool call
         event_stream_message["tool_call_id"] = message_chunk.tool_call_id
-        yield _make_event("tool_call_result", event_stream_message)
+        return _create_stream_event("tool_call_result", event_stream_message)
     elif isinstance(message_chunk, AIMessageChunk):
         # AI Message - Raw message tokens
         if message_chunk.tool_calls:
             # AI Message - Tool Call
             event_stream_message["tool_calls"] = message_chunk.tool_calls
-            event_stream_message["tool_call_chunks"] = message_chunk.tool_call_chunks
             event_stream_message["tool_call_chunks"] = _process_tool_call_chunks(
                 message_chunk.tool_call_chunks
             )
-            yield _make_event("tool_calls", event_stream_message)
+            return _create_stream_event("tool_calls", event_stream_message)
         elif message_chunk.tool_call_chunks:
             # AI Message - Tool Call Chunks
             event_stream_message["tool_call_chunks"] = _process_tool_call_chunks(
                 message_chunk.tool_call_chunks
             )
-            yield _make_event("tool_call_chunks", event_stream_message)
+            return _create_stream_event("tool_call_chunks", event_stream_message)
         else:
             # AI Message - Raw message tokens
-            yield _make_event("message_chunk", event_stream_message)
+            return _create_stream_event("message_chunk", event_stream_message)
     else:
         # Fallback: handle non-chunk BaseMessage (e.g., nodes that append AIMessage at once)
         # Ensure the frontend treats this as a completed message
         if "finish_reason" not in event_stream_message:
             event_stream_message["finish_reason"] = "stop"
-        yield _make_event("message_chunk", event_stream_message)
+        return _create_stream_event(
+            "message_chunk", event_stream_message, is_final=True
+        )
 
 
 async def _stream_graph_events(
@@ -281,17 +494,35 @@ async def _stream_graph_events(
         stream_mode=["messages", "updates"],
         subgraphs=True,
     ):
-        if isinstance(event_data, dict):
-            if "__interrupt__" in event_data:
-                yield _create_interrupt_event(thread_id, event_data)
-            continue
+        # "messages" mode yields (message, metadata) tuples, by far the most
+        # frequent case; "updates" mode yields dicts.
+        if isinstance(event_data, tuple):
+            message_chunk, message_metadata = event_data
+            yield _process_message_chunk(
+                message_chunk, message_metadata, thread_id, agent
+            )
+        elif "__interrupt__" in event_data:
+            yield _create_interrupt_event(thread_id, event_data)
 
-        message_chunk, message_metadata = cast(
-            tuple[BaseMessage, dict[str, any]], event_data
-        )
 
-        async for event in _process_message_chunk(
-            message_chunk, message_metadata, thread_id, agent
+@asynccontextmanager
+async def _postgres_checkpointer(checkpoint_url: str, connection_kwargs: dict):
+    """Open a Postgres connection pool and yield a ready checkpointer."""
+    async with AsyncConnectionPool(checkpoint_url, kwargs=connection_kwargs) as conn:
+        checkpointer = AsyncPostgresSaver(conn)
+        await checkpointer.setup()
+        yield checkpointer
+
+
+async def _stream_graph_events_with_checkpointer(
+    checkpointer_context, graph_instance, workflow_input, workflow_config, thread_id
+):
+    """Attach a checkpointer to the graph and stream its events."""
+    async with checkpointer_context as checkpointer:
+        graph_instance.checkpointer = checkpointer
+        graph_instance.store = in_memory_store
+        async for event in _stream_graph_events(
+            graph_instance, workflow_input, workflow_config, thread_id
         ):
             yield event
 
@@ -316,14 +547,25 @@ async def _astream_workflow_generator(
     request_logger = get_request_logger() if request_id else None
     
     # 用于收集中间结果和最终结果
-    intermediate_results = []
+    intermediate_results = deque(maxlen=MAX_LOGGED_INTERMEDIATE_RESULTS)
     final_result = ""
-    
+    stream_stats = _StreamStats()
+    log_queue = None
+    log_task = None
+
+    settings = _get_server_settings()
+
     try:
+        if request_logger:
+            log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+            log_task = asyncio.create_task(
+                _log_consumer(
+                    log_queue, request_logger, request_id, intermediate_results
+                )
+            )
+
         # Process initial messages
-        for message in messages:
-            if isinstance(message, dict) and "content" in message:
-                _process_initial_messages(message, thread_id)
+        _process_initial_messages(messages, thread_id)
 
         # Prepare workflow input
         workflow_input = {
@@ -353,74 +595,57 @@ async def _astream_workflow_generator(
             "mcp_settings": mcp_settings,
             "report_style": report_style.value,
             "enable_deep_thinking": enable_deep_thinking,
-            "recursion_limit": get_recursion_limit(),
+            "recursion_limit": settings.recursion_limit,
         }
         # 使用传入的graph_instance，如果没有则使用默认graph
         selected_graph = graph_instance or graph
 
-        checkpoint_saver = get_bool_env("LANGGRAPH_CHECKPOINT_SAVER", False)
-        checkpoint_url = get_str_env("LANGGRAPH_CHECKPOINT_DB_URL", "")
         # Handle checkpointer if configured
-        connection_kwargs = {
-            "autocommit": True,
-            "row_factory": "dict_row",
-            "prepare_threshold": 0,
-        }
-        if checkpoint_saver and checkpoint_url != "":
+        checkpoint_url = settings.checkpoint_url
+        checkpointer_context = None
+        if settings.checkpoint_saver and checkpoint_url != "":
             if checkpoint_url.startswith("postgresql://"):
                 logger.info("start async postgres checkpointer.")
-                async with AsyncConnectionPool(
-                    checkpoint_url, kwargs=connection_kwargs
-                ) as conn:
-                    checkpointer = AsyncPostgresSaver(conn)
-                    await checkpointer.setup()
-                    selected_graph.checkpointer = checkpointer
-                    selected_graph.store = in_memory_store
-                    async for event in _stream_graph_events(
-                        graph, workflow_input, workflow_config, thread_id
-                    ):
-                        # 记录prompts和中间结果
-                        if request_logger:
-                            _log_event_data(request_logger, request_id, event, intermediate_results)
-                        yield event
-
-            if checkpoint_url.startswith("mongodb://"):
+                checkpointer_context = _postgres_checkpointer(
+                    checkpoint_url, _CHECKPOINT_CONNECTION_KWARGS
+                )
+            elif checkpoint_url.startswith("mongodb://"):
                 logger.info("start async mongodb checkpointer.")
-                async with AsyncMongoDBSaver.from_conn_string(
+                checkpointer_context = AsyncMongoDBSaver.from_conn_string(
                     checkpoint_url
-                ) as checkpointer:
-                    selected_graph.checkpointer = checkpointer
-                    selected_graph.store = in_memory_store
-                    async for event in _stream_graph_events(
-                        graph, workflow_input, workflow_config, thread_id
-                    ):
-                        # 记录prompts和中间结果
-                        if request_logger:
-                            _log_event_data(request_logger, request_id, event, intermediate_results)
-                        yield event
+                )
+
+        if checkpointer_context is not None:
+            events = _stream_graph_events_with_checkpointer(
+                checkpointer_context,
+                selected_graph,
+                workflow_input,
+                workflow_config,
+                thread_id,
+            )
         else:
-            # Use graph without MongoDB checkpointer
-            async for event in _stream_graph_events(
+            events = _stream_graph_events(
                 selected_graph, workflow_input, workflow_config, thread_id
-            ):
-                # 记录prompts和中间结果
-                if request_logger:
-                    _log_event_data(request_logger, request_id, event, intermediate_results)
-                    
-                    # 收集最终结果
-                    if "final_report" in str(event):
-                        try:
-                            event_str = event.split("data: ")[1] if "data: " in event else event
-                            event_data = json.loads(event_str)
-                            if "content" in event_data and event_data.get("finish_reason") == "stop":
-                                final_result = event_data["content"]
-                        except (json.JSONDecodeError, IndexError, AttributeError):
-                            pass
-                
-                yield event
-        
+            )
+
+        async for event in events:
+            # 记录prompts和中间结果
+            if request_logger:
+                _enqueue_log_event(log_queue, event, stream_stats)
+
+                # 收集最终结果（只有工具调用、没有文本的完整消息不覆盖已有结果）
+                if event.is_final and event.data.get("content"):
+                    final_result = event.data["content"]
+
+            stream_stats.record(event)
+            yield event.frame
+
         # 记录最终响应
         if request_logger and request_id:
+            # 等待后台日志任务处理完队列中剩余的事件
+            await log_queue.put(None)
+            total_results = await log_task
+
             # 如果final_result为空，尝试从intermediate_results中提取
             if not final_result and intermediate_results:
                 for result in reversed(intermediate_results):
@@ -431,9 +656,9 @@ async def _astream_workflow_generator(
             request_logger.log_response(
                 request_id=request_id,
                 final_result=final_result,
-                intermediate_results=intermediate_results[-20:] if len(intermediate_results) > 20 else intermediate_results,  # 只保存最后20条中间结果
+                intermediate_results=list(intermediate_results),  # 只保存最后20条中间结果
                 response_metadata={
-                    "total_events": len(intermediate_results),
+                    "total_events": total_results,
                 }
             )
     
@@ -449,108 +674,162 @@ async def _astream_workflow_generator(
                 }
             )
         raise
+    finally:
+        if log_task is not None and not log_task.done():
+            log_task.cancel()
+        logger.info(
+            "Stream finished - Thread: %s, Events: %d, Bytes: %d, ToolCalls: %d, "
+            "DroppedLogEvents: %d",
+            thread_id,
+            stream_stats.events,
+            stream_stats.bytes,
+            stream_stats.tool_calls,
+            stream_stats.dropped_log_events,
+        )
 
 
-def _log_event_data(request_logger, request_id: str, event: str, intermediate_results: list):
+def _enqueue_log_event(
+    log_queue: asyncio.Queue, event: _StreamEvent, stream_stats: _StreamStats
+) -> None:
+    """Hand an event to the log consumer without ever blocking the stream."""
+    try:
+        log_queue.put_nowait((event.event_type, event.data))
+    except asyncio.QueueFull:
+        stream_stats.dropped_log_events += 1
+
+
+async def _log_consumer(
+    log_queue: asyncio.Queue,
+    request_logger,
+    request_id: str,
+    intermediate_results: deque,
+) -> int:
+    """
+    后台消费事件队列并写入请求日志，直到收到 None
+
+    Returns:
+        收集到的中间结果总数
     """
-    记录事件数据到日志
+    total_results = 0
+    while True:
+        item = await log_queue.get()
+        if item is None:
+            return total_results
+        event_type, event_data = item
+        if _log_event_data(
+            request_logger, request_id, event_type, event_data, intermediate_results
+        ):
+            total_results += 1
+
+
+def _log_event_data(
+    request_logger,
+    request_id: str,
+    event_type: str,
+    event_data: dict[str, Any],
+    intermediate_results: deque,
+) -> bool:
+    """
+    记录事件数据到日志，返回是否收集了一条中间结果
     """
     try:
-        # 解析事件
-        if "data: " in event:
-            event_parts = event.split("\n")
-            event_type = ""
-            event_data = None
-            
-            for part in event_parts:
-                if part.startswith("event: "):
-                    event_type = part[7:].strip()
-                elif part.startswith("data: "):
-                    try:
-                        event_data = json.loads(part[6:])
-                    except json.JSONDecodeError:
-                        continue
-            
-            if event_data:
-                # 记录AI消息内容（可能包含prompt）
-                if event_type == "message_chunk" and "content" in event_data:
-                    content = event_data["content"]
-                    agent_name = event_data.get("agent", "unknown")
-                    
-                    # 如果内容很长，可能是prompt或重要输出
-                    if len(content) > 100:
-                        request_logger.log_prompt(
-                            request_id=request_id,
-                            agent_name=agent_name,
-                            prompt=content,
-                            prompt_metadata={
-                                "event_type": event_type,
-                                "langgraph_node": event_data.get("langgraph_node", ""),
-                                "checkpoint_ns": event_data.get("checkpoint_ns", ""),
-                            }
-                        )
-                    
-                    # 收集中间结果
-                    intermediate_results.append({
-                        "agent": agent_name,
-                        "content": content,
-                        "finish_reason": event_data.get("finish_reason", ""),
-                        "timestamp": event_data.get("timestamp", ""),
-                    })
+        if event_data:
+            # 记录AI消息内容（可能包含prompt）
+            if event_type == "message_chunk" and "content" in event_data:
+                content = event_data["content"]
+                agent_name = event_data.get("agent", "unknown")
                 
-                # 记录工具调用
-                elif event_type == "tool_calls" and "tool_calls" in event_data:
-                    for tool_call in event_data["tool_calls"]:
-                        request_logger.log_prompt(
-                            request_id=request_id,
-                            agent_name=event_data.get("agent", "unknown"),
-                            prompt=f"Tool Call: {tool_call.get('name', 'unknown')}\nArgs: {json.dumps(tool_call.get('args', {}), ensure_ascii=False)}",
-                            prompt_metadata={
-                                "event_type": "tool_call",
-                                "tool_name": tool_call.get("name", "unknown"),
-                            }
-                        )
-    
+                # 如果内容很长，可能是prompt或重要输出
+                if len(content) > 100:
+                    request_logger.log_prompt(
+                        request_id=request_id,
+                        agent_name=agent_name,
+                        prompt=content,
+                        prompt_metadata={
+                            "event_type": event_type,
+                            "langgraph_node": event_data.get("langgraph_node", ""),
+                            "checkpoint_ns": event_data.get("checkpoint_ns", ""),
+                        }
+                    )
+                
+                # 收集中间结果
+                intermediate_results.append({
+                    "agent": agent_name,
+                    "content": content,
+                    "finish_reason": event_data.get("finish_reason", ""),
+                    "timestamp": event_data.get("timestamp", ""),
+                })
+                return True
+            
+            # 记录工具调用
+            elif event_type == "tool_calls" and "tool_calls" in event_data:
+                log_args = _get_server_settings().log_tool_call_args
+                for tool_call in event_data["tool_calls"]:
+                    prompt = f"Tool Call: {tool_call.get('name', 'unknown')}"
+                    if log_args:
+                        prompt += f"\nArgs: {_encode_json(tool_call.get('args', {}))}"
+                    request_logger.log_prompt(
+                        request_id=request_id,
+                        agent_name=event_data.get("agent", "unknown"),
+                        prompt=prompt,
+                        prompt_metadata={
+                            "event_type": "tool_call",
+                            "tool_name": tool_call.get("name", "unknown"),
+                        }
+                    )
+
     except Exception as e:
         logger.debug(f"Failed to log event data: {e}")
 
+    return False
+
+
+def _encode_json(data: dict[str, Any]) -> str:
+    """Serialize an event payload to compact UTF-8 JSON.
+
+    orjson handles the common case; payloads it rejects (e.g. integers wider
+    than 64 bits) fall back to the stdlib encoder.
+    """
+    try:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS).decode("utf-8")
+    except TypeError:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _create_stream_event(
+    event_type: str, data: dict[str, Any], is_final: bool = False
+) -> _StreamEvent:
+    """Serialize an event while keeping its payload available to the caller."""
+    return _StreamEvent(event_type, data, _make_event(event_type, data), is_final)
+
 
 def _make_event(event_type: str, data: dict[str, any]):
     if data.get("content") == "":
         data.pop("content")
-    # Ensure JSON serialization with proper encoding
-     # 添加详细的日志记录
-    thread_id = data.get("thread_id", "unknown")
-    agent = data.get("agent", "unknown")
-    message_id = data.get("id", "unknown")
-    content_preview = ""
-    
-    if "content" in data and data["content"]:
-        content_preview = str(data["content"])[:100] + "..." if len(str(data["content"])) > 100 else str(data["content"])
-    
-    logger.info(
-        f"🚀 Sending event to frontend - "
-        f"Type: {event_type}, "
-        f"Thread: {thread_id}, "
-        f"Agent: {agent}, "
-        f"MessageID: {message_id}, "
-        f"Content: {content_preview}"
-    )
-    
-    # 打印完整的消息数据用于调试
 
-    
+    # Per-event logging is debug-only: this runs once per streamed token.
+    if logger.isEnabledFor(logging.DEBUG):
+        content_preview = str(data.get("content") or "")
+        if len(content_preview) > 100:
+            content_preview = content_preview[:100] + "..."
+        logger.debug(
+            "🚀 Sending event to frontend - Type: %s, Thread: %s, Agent: %s, "
+            "MessageID: %s, Content: %s",
+            event_type,
+            data.get("thread_id", "unknown"),
+            data.get("agent", "unknown"),
+            data.get("id", "unknown"),
+            content_preview,
+        )
+
     try:
-        json_data = json.dumps(data, ensure_ascii=False)
+        json_data = _encode_json(data)
+        frame = f"event: {event_type}\ndata: {json_data}\n\n"
 
         finish_reason = data.get("finish_reason", "")
-        chat_stream_message(
-            data.get("thread_id", ""),
-            f"event: {event_type}\ndata: {json_data}\n\n",
-            finish_reason,
-        )
+        chat_stream_message(data.get("thread_id", ""), frame, finish_reason)
 
-        return f"event: {event_type}\ndata: {json_data}\n\n"
+        return frame
     except (TypeError, ValueError) as e:
         logger.error(f"Error serializing event data: {e}")
         # Return a safe error event
@@ -580,23 +859,9 @@ async def text_to_speech(request: TTSRequest):
             cluster=cluster,
             voice_type=voice_type,
         )
-        # Call the TTS API
-        result = tts_client.text_to_speech(
-            text=request.text[:1024],
-            encoding=request.encoding,
-            speed_ratio=request.speed_ratio,
-            volume_ratio=request.volume_ratio,
-            pitch_ratio=request.pitch_ratio,
-            text_type=request.text_type,
-            with_frontend=request.with_frontend,
-            frontend_type=request.frontend_type,
-        )
-
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=str(result["error"]))
-
-        # Decode the base64 audio data
-        audio_data = base64.b64decode(result["audio_data"])
+        # The client call and the base64 decode both block, so run them in a
+        # worker thread instead of stalling other streams on the event loop
+        audio_data = await asyncio.to_thread(_synthesize_speech, tts_client, request)
 
         # Return the audio file
         return Response(
@@ -614,13 +879,31 @@ async def text_to_speech(request: TTSRequest):
         raise HTTPException(status_code=500, detail=INTERNAL_SERVER_ERROR_DETAIL)
 
 
+def _synthesize_speech(tts_client: VolcengineTTS, request: TTSRequest) -> bytes:
+    """Call the TTS API and return the decoded audio bytes."""
+    result = tts_client.text_to_speech(
+        text=request.text[:1024],
+        encoding=request.encoding,
+        speed_ratio=request.speed_ratio,
+        volume_ratio=request.volume_ratio,
+        pitch_ratio=request.pitch_ratio,
+        text_type=request.text_type,
+        with_frontend=request.with_frontend,
+        frontend_type=request.frontend_type,
+    )
+
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=str(result["error"]))
+
+    return base64.b64decode(result["audio_data"])
+
+
 @app.post("/api/podcast/generate")
 async def generate_podcast(request: GeneratePodcastRequest):
     try:
         report_content = request.content
-        print(report_content)
-        workflow = build_podcast_graph()
-        final_state = workflow.invoke({"input": report_content})
+        workflow = podcast_graph
+        final_state = await workflow.ainvoke({"input": report_content})
         audio_bytes = final_state["output"]
         return Response(content=audio_bytes, media_type="audio/mp3")
     except Exception as e:
@@ -632,14 +915,14 @@ async def generate_podcast(request: GeneratePodcastRequest):
 async def generate_ppt(request: GeneratePPTRequest):
     try:
         report_content = request.content
-        print(report_content)
-        workflow = build_ppt_graph()
-        final_state = workflow.invoke({"input": report_content})
+        workflow = ppt_graph
+        final_state = await workflow.ainvoke({"input": report_content})
         generated_file_path = final_state["generated_file_path"]
-        with open(generated_file_path, "rb") as f:
-            ppt_bytes = f.read()
-        return Response(
-            content=ppt_bytes,
+        if not os.path.isfile(generated_file_path):
+            raise FileNotFoundError(generated_file_path)
+        # Stream the deck from disk instead of loading it into memory
+        return FileResponse(
+            generated_file_path,
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
         )
     except Exception as e:
@@ -652,7 +935,7 @@ async def generate_prose(request: GenerateProseRequest):
     try:
         sanitized_prompt = request.prompt.replace("\r\n", "").replace("\n", "")
         logger.info(f"Generating prose for prompt: {sanitized_prompt}")
-        workflow = build_prose_graph()
+        workflow = prose_graph
         events = workflow.astream(
             {
                 "content": request.prompt,
@@ -662,9 +945,8 @@ async def generate_prose(request: GenerateProseRequest):
             stream_mode="messages",
             subgraphs=True,
         )
-        return StreamingResponse(
-            (f"data: {event[0].content}\n\n" async for _, event in events),
-            media_type="text/event-stream",
+        return _event_source_response(
+            f"data: {event[0].content}\n\n" async for _, event in events
         )
     except Exception as e:
         logger.exception(f"Error occurred during prose generation: {str(e)}")
@@ -697,8 +979,8 @@ async def enhance_prompt(request: EnhancePromptRequest):
         else:
             report_style = ReportStyle.ACADEMIC
 
-        workflow = build_prompt_enhancer_graph()
-        final_state = workflow.invoke(
+        workflow = prompt_enhancer_graph
+        final_state = await workflow.ainvoke(
             {
                 "prompt": request.prompt,
                 "context": request.context,
@@ -715,7 +997,7 @@ async def enhance_prompt(request: EnhancePromptRequest):
 async def mcp_server_metadata(request: MCPServerMetadataRequest):
     """Get information about an MCP server."""
     # Check if MCP server configuration is enabled
-    if not get_bool_env("ENABLE_MCP_SERVER_CONFIGURATION", False):
+    if not _get_server_settings().mcp_enabled:
         raise HTTPException(
             status_code=403,
             detail="MCP server configuration is disabled. Set ENABLE_MCP_SERVER_CONFIGURATION=true to enable MCP features.",
@@ -729,8 +1011,8 @@ async def mcp_server_metadata(request: MCPServerMetadataRequest):
         if request.timeout_seconds is not None:
             timeout = request.timeout_seconds
 
-        # Load tools from the MCP server using the utility function
-        tools = await load_mcp_tools(
+        # Load tools from the MCP server, reusing a recent listing when available
+        tools = await load_mcp_tools_cached(
             server_type=request.transport,
             command=request.command,
             args=request.args,
@@ -787,9 +1069,9 @@ async def submit_feedback(request: FeedbackRequest):
     try:
         request_logger = get_request_logger()
         
-        # 构建请求ID - 使用thread_id和当前时间戳
-        from datetime import datetime
-        request_id = f"{request.thread_id}_{datetime.now().isoformat()}"
+        # 构建请求ID - 使用thread_id和纳秒时间戳，避免同一线程突发反馈时ID重复
+        timestamp = fast_now()
+        request_id = f"{request.thread_id}_{time.time_ns()}"
         
         # 记录用户反馈到日志系统
         request_logger.log_feedback(
@@ -803,7 +1085,7 @@ async def submit_feedback(request: FeedbackRequest):
                 "user_query": request.user_query,
                 "feedback_text": request.feedback_text,
                 "additional_info": request.additional_info or {},
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
             }
         )
         
@@ -1,9 +1,14 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import hashlib
+import json
 import logging
+import time
+from collections import OrderedDict
 from datetime import timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from mcp import ClientSession, StdioServerParameters
@@ -13,6 +18,15 @@ from mcp.client.streamable_http import streamablehttp_client
 
 logger = logging.getLogger(__name__)
 
+# Tool listings are reused for this long before the MCP server is asked again
+MCP_TOOLS_CACHE_TTL_SECONDS = 60
+MCP_TOOLS_CACHE_MAXSIZE = 128
+
+# cache key -> (expiry on the monotonic clock, tools), least recently used first
+_mcp_tools_cache: "OrderedDict[str, Tuple[float, List]]" = OrderedDict()
+# cache key -> task loading the tools, shared by concurrent identical requests
+_mcp_tools_inflight: Dict[str, "asyncio.Task[List]"] = {}
+
 
 async def _get_tools_from_client_session(
     client_context_manager: Any, timeout_seconds: int = 10
@@ -120,3 +134,89 @@ async def load_mcp_tools(
             logger.exception(f"Error loading MCP tools: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
         raise
+
+
+def _mcp_tools_cache_key(
+    server_type: str,
+    command: Optional[str],
+    args: Optional[List[str]],
+    url: Optional[str],
+    env: Optional[Dict[str, str]],
+    headers: Optional[Dict[str, str]],
+) -> str:
+    """Hash the connection settings so secrets in env/headers are not kept as keys."""
+    payload = json.dumps(
+        [server_type, command, args or [], url, env or {}, headers or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+async def _load_and_cache_mcp_tools(key: str, **kwargs: Any) -> List:
+    tools = await load_mcp_tools(**kwargs)
+    _mcp_tools_cache[key] = (time.monotonic() + MCP_TOOLS_CACHE_TTL_SECONDS, tools)
+    _mcp_tools_cache.move_to_end(key)
+    while len(_mcp_tools_cache) > MCP_TOOLS_CACHE_MAXSIZE:
+        _mcp_tools_cache.popitem(last=False)
+    return tools
+
+
+async def load_mcp_tools_cached(
+    server_type: str,
+    command: Optional[str] = None,
+    args: Optional[List[str]] = None,
+    url: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout_seconds: int = 60,
+) -> List:
+    """
+    Load tools from an MCP server, reusing recent results for the same server.
+
+    Results are kept for MCP_TOOLS_CACHE_TTL_SECONDS. Concurrent calls for the
+    same server share a single load_mcp_tools call. Failures are not cached.
+
+    Args:
+        Same as load_mcp_tools. timeout_seconds is not part of the cache key.
+
+    Returns:
+        List of available tools from the MCP server
+
+    Raises:
+        HTTPException: If there's an error loading the tools
+    """
+    key = _mcp_tools_cache_key(server_type, command, args, url, env, headers)
+
+    entry = _mcp_tools_cache.get(key)
+    if entry is not None:
+        expires_at, tools = entry
+        if expires_at > time.monotonic():
+            _mcp_tools_cache.move_to_end(key)
+            return tools
+        del _mcp_tools_cache[key]
+
+    task = _mcp_tools_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _load_and_cache_mcp_tools(
+                key,
+                server_type=server_type,
+                command=command,
+                args=args,
+                url=url,
+                env=env,
+                headers=headers,
+                timeout_seconds=timeout_seconds,
+            )
+        )
+        _mcp_tools_inflight[key] = task
+        task.add_done_callback(lambda _: _mcp_tools_inflight.pop(key, None))
+
+    # Shield the shared load so one cancelled caller does not fail the others
+    return await asyncio.shield(task)
+
+
+def clear_mcp_tools_cache() -> None:
+    """Drop all cached MCP tool listings."""
+    _mcp_tools_cache.clear()
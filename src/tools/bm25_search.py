@@ -1,144 +1,483 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import gzip
+import httpx
 import logging
+import orjson
 import os
+import random
 import requests
+import threading
 import time
-from typing import Annotated, Optional
-from langchain_core.tools import tool
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .decorators import log_io
 
 logger = logging.getLogger(__name__)
 
-@tool
-@log_io
-def bm25_search_tool(
-    query: Annotated[str, "The search query in Chinese"],
-    limit: Annotated[int, "Number of top results to return"] = 3,
-    include_snippets: Annotated[bool, "Whether to include document snippets"] = True,
-    server_url: Annotated[Optional[str], "BM25 server URL"] = None,
+
+class BM25SearchInput(BaseModel):
+    query: str = Field(description="The search query in Chinese")
+    limit: int = Field(default=3, description="Number of top results to return")
+    include_snippets: bool = Field(
+        default=True, description="Whether to include document snippets"
+    )
+    server_url: Optional[str] = Field(default=None, description="BM25 server URL")
+
+
+class BM25ServerInput(BaseModel):
+    server_url: Optional[str] = Field(default=None, description="BM25 server URL")
+
+
+# BM25数据库中的文档类别，搜索工具描述和数据库说明共用
+_DOCUMENT_CATEGORIES = """🍽️ 菜品相关文档:
+- 菜品SOP (标准操作程序)
+- 菜品制作流程和工艺标准
+- 菜品配方和配料清单
+- 菜品质量控制标准
+- 菜品成本核算和定价
+- 菜品营养分析和标签
+
+👥 公司管理文档:
+- 公司企业文化和价值观
+- 公司组织架构和部门职责
+- 公司管理制度和流程
+- 公司发展战略和规划
+- 公司品牌形象和宣传资料
+
+📚 培训资料:
+- 各岗位培训教材和手册
+- 新员工入职培训资料
+- 专业技能培训课程
+- 安全操作培训指南
+- 服务标准培训材料
+- 管理岗位培训内容
+
+🔧 操作流程:
+- 厨房操作流程和规范
+- 设备使用和维护指南
+- 食品安全操作程序
+- 清洁卫生标准流程
+- 库存管理和采购流程
+- 客户服务标准流程"""
+
+BM25_SEARCH_DESCRIPTION = f"""Use this tool to search Chinese documents using BM25 retrieval.
+
+This tool searches a specialized Chinese document database containing:
+
+{_DOCUMENT_CATEGORIES}
+
+Best search strategies:
+- 菜品名称: "藕汤", "筒骨煨藕汤", "红烧肉"
+- SOP相关: "菜品SOP", "标准操作程序", "制作流程"
+- 培训相关: "培训资料", "岗位培训", "新员工培训"
+- 企业文化: "企业文化", "公司价值观", "品牌文化"
+- 流程相关: "操作流程", "工作流程", "服务流程"
+- 岗位相关: "厨师培训", "服务员培训", "管理培训"
+
+Args:
+    query: The search query in Chinese
+    limit: Number of top results to return (default: 3)
+    include_snippets: Whether to include document snippets (default: True)
+    server_url: BM25 server URL (default: http://localhost:5003)
+
+Returns:
+    Search results as formatted string with titles, scores, and content snippets"""
+
+_DB_INFO = f"""
+📚 BM25数据库内容说明:
+
+{_DOCUMENT_CATEGORIES}
+
+🔍 搜索建议:
+- 菜品相关: "藕汤SOP", "筒骨煨藕汤制作流程", "红烧肉配方"
+- SOP相关: "菜品SOP", "标准操作程序", "制作流程"
+- 培训相关: "培训资料", "岗位培训", "新员工培训"
+- 企业文化: "企业文化", "公司价值观", "品牌文化"
+- 流程相关: "操作流程", "工作流程", "服务流程"
+- 岗位相关: "厨师培训", "服务员培训", "管理培训"
+
+💡 最佳实践:
+- 优先使用BM25搜索内部文档和培训资料
+- 结合web搜索获取最新行业信息
+- 使用具体关键词提高搜索精度
+- 根据查询类型选择合适的搜索策略
+"""
+
+
+# 超过此大小的搜索请求体用gzip压缩发送（响应的gzip压缩由HTTP客户端默认协商）
+SEARCH_GZIP_MIN_BYTES = 1024
+# 对压缩请求体返回415的服务地址，之后直接发送未压缩请求
+_GZIP_UNSUPPORTED_SERVERS: Set[str] = set()
+
+# 临时性故障（连接被重置、503等）通常在1秒内恢复，用带抖动的指数退避重试
+RETRY_ATTEMPTS = 3
+RETRY_INITIAL_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+
+# 所有BM25工具共用一个连接池，避免每次调用都重新建立TCP连接
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Return the shared BM25 HTTP session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=32,
+                    max_retries=Retry(
+                        total=RETRY_ATTEMPTS,
+                        backoff_factor=RETRY_INITIAL_DELAY,
+                        backoff_max=RETRY_MAX_DELAY,
+                        backoff_jitter=RETRY_INITIAL_DELAY,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        # GET 在 429/5xx 和读错误时重试；POST 只在连接失败时重试
+                        allowed_methods=["GET"],
+                    ),
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _SESSION = session
+    return _SESSION
+
+
+# 异步客户端按 (事件循环, 服务地址) 缓存，复用连接池。连接池绑定创建它的事件循环，
+# 新的事件循环（如再次 asyncio.run）会得到新的客户端；事件循环被回收时缓存随之清除
+_LoopClients = Dict[str, httpx.AsyncClient]
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_client(server_url: str) -> httpx.AsyncClient:
+    """Return the running loop's shared async client for a BM25 server, creating it on first use."""
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(server_url)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=server_url,
+            timeout=httpx.Timeout(10.0, connect=2.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        clients[server_url] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close the shared async clients created on the running event loop."""
+    clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_INITIAL_DELAY * 2**attempt))
+
+
+async def _apost_with_retry(
+    client: httpx.AsyncClient, path: str, **kwargs: Any
+) -> httpx.Response:
+    """POST to the BM25 server, retrying only when the connection could not be made."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return await client.post(path, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            if attempt == RETRY_ATTEMPTS - 1:
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning(f"BM25服务连接失败，{delay:.2f}秒后重试: {e}")
+            await asyncio.sleep(delay)
+
+
+def _get_service_info(
+    cache: "_TTLCache", server_url: str, path: str
+) -> Tuple[bool, Any]:
+    """
+    GET a BM25 service endpoint, caching both successes and failures.
+
+    Returns (True, parsed JSON) on success or (False, error message) on failure.
+    Caching failures keeps polling agents from piling connection attempts onto
+    a server that is down.
+    """
+    cached = cache.get(server_url)
+    if cached is not None:
+        return cached
+    try:
+        response = _get_session().get(f"{server_url}{path}", timeout=5)
+        response.raise_for_status()
+        result = (True, response.json())
+    except Exception as e:
+        result = (False, str(e))
+    cache.set(server_url, result)
+    return result
+
+
+def _resolve_server_url(server_url: Optional[str]) -> str:
+    # Resolve BM25 server URL from param or environment (fallback to localhost for local dev)
+    return server_url or os.getenv("BM25_SERVER_URL", "http://localhost:5003")
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed number of seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# 常见查询（如菜品名、"菜品SOP"）在智能体循环中会反复出现，缓存格式化后的结果；
+# 设置较短的过期时间，使索引更新最终可见
+SEARCH_CACHE_TTL_SECONDS = 300
+_SEARCH_CACHE = _TTLCache(maxsize=512, ttl=SEARCH_CACHE_TTL_SECONDS)
+
+# 健康检查和统计信息被监控循环频繁调用，按服务地址短时间缓存（包括失败结果）
+_HEALTH_CACHE = _TTLCache(maxsize=8, ttl=5)
+_STATS_CACHE = _TTLCache(maxsize=8, ttl=30)
+
+
+def _format_search_results(
+    query: str, limit: int, result: dict, elapsed: float
 ) -> str:
-    """Use this tool to search Chinese documents using BM25 retrieval.
-    
-    This tool searches a specialized Chinese document database containing:
-    
-    🍽️ 菜品相关文档:
-    - 菜品SOP (Standard Operating Procedures) - 标准操作程序
-    - 菜品制作流程和工艺标准
-    - 菜品配方和配料清单
-    - 菜品质量控制标准
-    - 菜品成本核算和定价
-    - 菜品营养分析和标签
+    """Format a BM25 server response for the agent."""
+    results = result.get('results', [])
+    search_time = result.get('search_time_seconds', elapsed)
+    if len(results) > limit:
+        results = results[:limit]
+        logger.warning(f"BM25服务器返回了{len(result.get('results', []))}个结果，但请求的limit是{limit}，已截取前{limit}个结果")
+    if not results:
+        return f"未找到与 '{query}' 相关的结果"
     
-    👥 公司管理文档:
-    - 公司企业文化和价值观
-    - 公司组织架构和部门职责
-    - 公司管理制度和流程
-    - 公司发展战略和规划
-    - 公司品牌形象和宣传资料
+    # 每个结果拼成一个字符串，按下标写入预分配的列表
+    formatted_results = [None] * (3 + len(results))
+    formatted_results[0] = f"🔍 搜索: '{query}' (用时: {search_time:.3f}秒)"
+    formatted_results[1] = f"📊 找到 {len(results)} 个结果"
+    formatted_results[2] = ""
     
-    📚 培训资料:
-    - 各岗位培训教材和手册
-    - 新员工入职培训资料
-    - 专业技能培训课程
-    - 安全操作培训指南
-    - 服务标准培训材料
-    - 管理岗位培训内容
-    
-    🔧 操作流程:
-    - 厨房操作流程和规范
-    - 设备使用和维护指南
-    - 食品安全操作程序
-    - 清洁卫生标准流程
-    - 库存管理和采购流程
-    - 客户服务标准流程
-    
-    Best search strategies:
-    - 菜品名称: "藕汤", "筒骨煨藕汤", "红烧肉"
-    - SOP相关: "菜品SOP", "标准操作程序", "制作流程"
-    - 培训相关: "培训资料", "岗位培训", "新员工培训"
-    - 企业文化: "企业文化", "公司价值观", "品牌文化"
-    - 流程相关: "操作流程", "工作流程", "服务流程"
-    - 岗位相关: "厨师培训", "服务员培训", "管理培训"
+    for i, doc in enumerate(results, 1):
+        snippet = doc.get('snippet', '')
+        formatted_results[2 + i] = (
+            f"## 结果 {i}\n"
+            f"**标题**: {doc.get('title', 'N/A')}\n"
+            f"**评分**: {doc.get('score', 0):.3f}\n"
+            f"**路径**: {doc.get('path', '')}\n"
+            + (f"**内容片段**: {snippet}\n" if snippet else "")
+        )
     
-    Args:
-        query: The search query in Chinese
-        limit: Number of top results to return (default: 3)
-        include_snippets: Whether to include document snippets (default: True)
-        server_url: BM25 server URL (default: http://localhost:5003)
-        
-    Returns:
-        Search results as formatted string with titles, scores, and content snippets
+    return "\n".join(formatted_results)
+
+
+def _build_search_payload(query: str, limit: int, include_snippets: bool) -> dict:
     """
-    try:
-        # Resolve BM25 server URL from param or environment (fallback to localhost for local dev)
-        if not server_url:
-            server_url = os.getenv("BM25_SERVER_URL", "http://localhost:5003")
-        # 使用POST方式调用BM25服务
-        data = {
-            "query": query,
-            "limit": limit,
-            "include_snippets": include_snippets
-        }
-        
-        start_time = time.time()
-        response = requests.post(
+    Build the /search request body.
+
+    Besides the query, the body carries retrieval hints for servers that
+    support dynamic pruning: "strategy" (e.g. "wand" for block-max WAND),
+    "top_k" (the number of results the server must rank exactly, allowing it
+    to stop early) and "k1_block_max" (use precomputed per-block score upper
+    bounds). Servers that do not know these fields ignore them. Set
+    BM25_STRATEGY to an empty string to omit the hints.
+    """
+    data = {
+        "query": query,
+        "limit": limit,
+        "include_snippets": include_snippets
+    }
+    strategy = os.getenv("BM25_STRATEGY", "wand")
+    if strategy:
+        data["strategy"] = strategy
+        data["top_k"] = limit
+        data["k1_block_max"] = True
+    return data
+
+
+def _compress_search_body(
+    server_url: str, data: dict
+) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    """
+    Return a gzip-compressed JSON body and its headers for large search requests.
+
+    Returns None when the body is small enough to send as-is, or when the server
+    has already rejected compressed bodies with 415.
+    """
+    if server_url in _GZIP_UNSUPPORTED_SERVERS:
+        return None
+    body = orjson.dumps(data)
+    if len(body) < SEARCH_GZIP_MIN_BYTES:
+        return None
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    return gzip.compress(body), headers
+
+
+def _mark_gzip_unsupported(server_url: str) -> None:
+    logger.info(f"BM25服务不支持gzip请求体，改为发送未压缩请求: {server_url}")
+    _GZIP_UNSUPPORTED_SERVERS.add(server_url)
+
+
+def _search_and_format(
+    query: str, limit: int, include_snippets: bool, server_url: str
+) -> str:
+    """Query the BM25 server and format the results for the agent."""
+    # 使用POST方式调用BM25服务
+    data = _build_search_payload(query, limit, include_snippets)
+    
+    start_time = time.time()
+    session = _get_session()
+    response = None
+    compressed = _compress_search_body(server_url, data)
+    if compressed is not None:
+        body, headers = compressed
+        response = session.post(
+            f"{server_url}/search", data=body, headers=headers, timeout=10
+        )
+        if response.status_code == 415:
+            _mark_gzip_unsupported(server_url)
+            response = None
+    if response is None:
+        response = session.post(
             f"{server_url}/search",
             json=data,
             timeout=10
         )
-        end_time = time.time()
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        # 格式化结果
-        formatted_results = []
-        results = result.get('results', [])
-        search_time = result.get('search_time_seconds', end_time - start_time)
-        if len(results) > limit:
-            results = results[:limit]
-            logger.warning(f"BM25服务器返回了{len(result.get('results', []))}个结果，但请求的limit是{limit}，已截取前{limit}个结果")
-        if not results:
-            return f"未找到与 '{query}' 相关的结果"
-        
-        formatted_results.append(f"🔍 搜索: '{query}' (用时: {search_time:.3f}秒)")
-        formatted_results.append(f"📊 找到 {len(results)} 个结果")
-        formatted_results.append("")
-        
-        for i, doc in enumerate(results, 1):
-            title = doc.get('title', 'N/A')
-            score = doc.get('score', 0)
-            snippet = doc.get('snippet', '')
-            path = doc.get('path', '')
-            
-            formatted_results.append(f"## 结果 {i}")
-            formatted_results.append(f"**标题**: {title}")
-            formatted_results.append(f"**评分**: {score:.3f}")
-            formatted_results.append(f"**路径**: {path}")
-            
-            if snippet:
-                formatted_results.append(f"**内容片段**: {snippet}")
-            
-            formatted_results.append("")
-        
-        return "\n".join(formatted_results)
-        
+    end_time = time.time()
+    
+    response.raise_for_status()
+    return _format_search_results(query, limit, response.json(), end_time - start_time)
+
+
+async def _asearch_and_format(
+    query: str, limit: int, include_snippets: bool, server_url: str
+) -> str:
+    """Async variant of _search_and_format used when the tool is awaited."""
+    data = _build_search_payload(query, limit, include_snippets)
+
+    start_time = time.time()
+    client = _get_async_client(server_url)
+    response = None
+    compressed = _compress_search_body(server_url, data)
+    if compressed is not None:
+        body, headers = compressed
+        response = await _apost_with_retry(
+            client, "/search", content=body, headers=headers
+        )
+        if response.status_code == 415:
+            _mark_gzip_unsupported(server_url)
+            response = None
+    if response is None:
+        response = await _apost_with_retry(client, "/search", json=data)
+    end_time = time.time()
+
+    response.raise_for_status()
+    return _format_search_results(query, limit, response.json(), end_time - start_time)
+
+
+def _log_search_error(error_msg: str) -> str:
+    logger.error(error_msg)
+    return error_msg
+
+
+@log_io
+def _bm25_search(
+    query: str,
+    limit: int = 3,
+    include_snippets: bool = True,
+    server_url: Optional[str] = None,
+) -> str:
+    """Search the BM25 document database; the tool description is BM25_SEARCH_DESCRIPTION."""
+    try:
+        server_url = _resolve_server_url(server_url)
+        cache_key = (query, limit, include_snippets, server_url)
+        cached = _SEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+        formatted = _search_and_format(query, limit, include_snippets, server_url)
+        # 只缓存成功的结果，请求失败时会抛出异常而不会写入缓存
+        _SEARCH_CACHE.set(cache_key, formatted)
+        return formatted
+
     except requests.exceptions.RequestException as e:
-        error_msg = f"BM25搜索服务连接失败: {str(e)}"
-        logger.error(error_msg)
-        return error_msg
+        return _log_search_error(f"BM25搜索服务连接失败: {str(e)}")
     except Exception as e:
-        error_msg = f"BM25搜索出错: {str(e)}"
-        logger.error(error_msg)
-        return error_msg
+        return _log_search_error(f"BM25搜索出错: {str(e)}")
+
 
-@tool
 @log_io
-def bm25_health_check_tool(
-    server_url: Annotated[Optional[str], "BM25 server URL"] = None
+async def _abm25_search(
+    query: str,
+    limit: int = 3,
+    include_snippets: bool = True,
+    server_url: Optional[str] = None,
 ) -> str:
+    """Async implementation of bm25_search_tool; does not block the event loop."""
+    try:
+        server_url = _resolve_server_url(server_url)
+        cache_key = (query, limit, include_snippets, server_url)
+        cached = _SEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+        formatted = await _asearch_and_format(
+            query, limit, include_snippets, server_url
+        )
+        _SEARCH_CACHE.set(cache_key, formatted)
+        return formatted
+
+    except httpx.HTTPError as e:
+        return _log_search_error(f"BM25搜索服务连接失败: {str(e)}")
+    except Exception as e:
+        return _log_search_error(f"BM25搜索出错: {str(e)}")
+
+
+# 同时提供同步和异步实现：在异步图节点中通过 ainvoke 调用时不会阻塞事件循环
+bm25_search_tool = StructuredTool.from_function(
+    func=_bm25_search,
+    coroutine=_abm25_search,
+    name="bm25_search_tool",
+    description=BM25_SEARCH_DESCRIPTION,
+    args_schema=BM25SearchInput,
+    infer_schema=False,
+)
+
+@log_io
+def _bm25_health_check(server_url: Optional[str] = None) -> str:
     """Check the health status of BM25 search service.
     
     Args:
@@ -147,27 +486,30 @@ def bm25_health_check_tool(
     Returns:
         Health status information
     """
+    ok, payload = _get_service_info(_HEALTH_CACHE, _resolve_server_url(server_url), "/health")
+    if not ok:
+        return f"❌ BM25服务状态检查失败: {payload}"
+    
     try:
-        if not server_url:
-            server_url = os.getenv("BM25_SERVER_URL", "http://localhost:5003")
-        response = requests.get(f"{server_url}/health", timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        status = data.get('status', 'unknown')
-        doc_count = data.get('documents_count', 0)
-        vocab_size = data.get('vocabulary_size', 0)
+        doc_count = payload.get('documents_count', 0)
+        vocab_size = payload.get('vocabulary_size', 0)
         
         return f"✅ BM25服务状态正常\n📊 文档数: {doc_count}\n📚 词汇量: {vocab_size}"
         
     except Exception as e:
         return f"❌ BM25服务状态检查失败: {str(e)}"
 
-@tool
+
+bm25_health_check_tool = StructuredTool.from_function(
+    func=_bm25_health_check,
+    name="bm25_health_check_tool",
+    args_schema=BM25ServerInput,
+    infer_schema=False,
+)
+
+
 @log_io
-def bm25_stats_tool(
-    server_url: Annotated[Optional[str], "BM25 server URL"] = None
-) -> str:
+def _bm25_stats(server_url: Optional[str] = None) -> str:
     """Get statistics from BM25 search service.
     
     Args:
@@ -176,13 +518,12 @@ def bm25_stats_tool(
     Returns:
         Statistics information
     """
+    ok, payload = _get_service_info(_STATS_CACHE, _resolve_server_url(server_url), "/stats")
+    if not ok:
+        return f"❌ 统计信息获取失败: {payload}"
+    
     try:
-        if not server_url:
-            server_url = os.getenv("BM25_SERVER_URL", "http://localhost:5003")
-        response = requests.get(f"{server_url}/stats", timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        stats = data.get('statistics', {})
+        stats = payload.get('statistics', {})
         
         doc_count = stats.get('documents_count', 0)
         vocab_size = stats.get('vocabulary_size', 0)
@@ -208,11 +549,17 @@ def bm25_stats_tool(
     except Exception as e:
         return f"❌ 统计信息获取失败: {str(e)}"
 
-@tool
+
+bm25_stats_tool = StructuredTool.from_function(
+    func=_bm25_stats,
+    name="bm25_stats_tool",
+    args_schema=BM25ServerInput,
+    infer_schema=False,
+)
+
+
 @log_io
-def bm25_database_info_tool(
-    server_url: Annotated[Optional[str], "BM25 server URL"] = None
-) -> str:
+def _bm25_database_info(server_url: Optional[str] = None) -> str:
     """Get information about the BM25 database content and capabilities.
     
     Args:
@@ -222,51 +569,12 @@ def bm25_database_info_tool(
         Database content information
     """
     # Keep signature consistent; this tool provides static info.
-    return """
-📚 BM25数据库内容说明:
-
-🍽️ 菜品相关文档:
-- 菜品SOP (标准操作程序)
-- 菜品制作流程和工艺标准
-- 菜品配方和配料清单
-- 菜品质量控制标准
-- 菜品成本核算和定价
-- 菜品营养分析和标签
-
-👥 公司管理文档:
-- 公司企业文化和价值观
-- 公司组织架构和部门职责
-- 公司管理制度和流程
-- 公司发展战略和规划
-- 公司品牌形象和宣传资料
-
-📚 培训资料:
-- 各岗位培训教材和手册
-- 新员工入职培训资料
-- 专业技能培训课程
-- 安全操作培训指南
-- 服务标准培训材料
-- 管理岗位培训内容
+    return _DB_INFO
 
-🔧 操作流程:
-- 厨房操作流程和规范
-- 设备使用和维护指南
-- 食品安全操作程序
-- 清洁卫生标准流程
-- 库存管理和采购流程
-- 客户服务标准流程
 
-🔍 搜索建议:
-- 菜品相关: "藕汤SOP", "筒骨煨藕汤制作流程", "红烧肉配方"
-- SOP相关: "菜品SOP", "标准操作程序", "制作流程"
-- 培训相关: "培训资料", "岗位培训", "新员工培训"
-- 企业文化: "企业文化", "公司价值观", "品牌文化"
-- 流程相关: "操作流程", "工作流程", "服务流程"
-- 岗位相关: "厨师培训", "服务员培训", "管理培训"
-
-💡 最佳实践:
-- 优先使用BM25搜索内部文档和培训资料
-- 结合web搜索获取最新行业信息
-- 使用具体关键词提高搜索精度
-- 根据查询类型选择合适的搜索策略
-"""
+bm25_database_info_tool = StructuredTool.from_function(
+    func=_bm25_database_info,
+    name="bm25_database_info_tool",
+    args_schema=BM25ServerInput,
+    infer_schema=False,
+)
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import functools
+import inspect
 import logging
 from typing import Any, Callable, Type, TypeVar
 
@@ -21,14 +22,29 @@ def log_io(func: Callable) -> Callable:
         The wrapped function with input/output logging
     """
 
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    def _log_call(args: Any, kwargs: Any) -> str:
         # Log input parameters
         func_name = func.__name__
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
         )
         logger.info(f"Tool {func_name} called with parameters: {params}")
+        return func_name
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            func_name = _log_call(args, kwargs)
+            result = await func(*args, **kwargs)
+            logger.info(f"Tool {func_name} returned: {result}")
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        func_name = _log_call(args, kwargs)
 
         # Execute the function
         result = func(*args, **kwargs)
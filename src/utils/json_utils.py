@@ -8,6 +8,11 @@ import json_repair
 
 logger = logging.getLogger(__name__)
 
+# Characters escaped by sanitize_args, applied in a single translate() pass
+_SANITIZE_ARGS_TABLE = str.maketrans(
+    {"[": "&#91;", "]": "&#93;", "{": "&#123;", "}": "&#125;"}
+)
+
 
 def sanitize_args(args: Any) -> str:
     """
@@ -21,13 +26,7 @@ def sanitize_args(args: Any) -> str:
     """
     if not isinstance(args, str):
         return ""
-    else:
-        return (
-            args.replace("[", "&#91;")
-            .replace("]", "&#93;")
-            .replace("{", "&#123;")
-            .replace("}", "&#125;")
-        )
+    return args.translate(_SANITIZE_ARGS_TABLE)
 
 
 def repair_json_output(content: str) -> str:
@@ -6,57 +6,179 @@
 日志文件不会被删除，用于定期审查
 """
 
+import atexit
+import itertools
 import json
 import logging
+import mmap
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional
 from threading import Lock
 
+import orjson
+
+from src.config.configuration import get_int_env
+
 logger = logging.getLogger(__name__)
 
+_ORJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+# 后台写入线程每批最多写入的条目数
+WRITER_BATCH_SIZE = 256
+
+# 通知写入线程退出的标记
+_STOP = object()
+
+# 请求日志中每条消息保留的最大字符数（可通过 REQUEST_LOG_MAX_CONTENT 配置）
+DEFAULT_MAX_CONTENT_CHARS = 4096
+
+# 每个线程缓存 (秒, "YYYY-MM-DDTHH:MM:SS")，同一秒内只需拼接微秒部分
+_timestamp_cache = threading.local()
+
+
+def fast_now() -> str:
+    """
+    返回当前本地时间的ISO格式字符串（精确到微秒）
+
+    与 datetime.now().isoformat() 的格式一致，但同一秒内复用已格式化的日期部分，
+    且始终包含微秒。
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached = getattr(_timestamp_cache, "value", None)
+    if cached is None or cached[0] != seconds:
+        prefix = datetime.fromtimestamp(seconds).strftime("%Y-%m-%dT%H:%M:%S")
+        cached = (seconds, prefix)
+        _timestamp_cache.value = cached
+    return f"{cached[1]}.{nanos // 1000:06d}"
+
+
+def _project_messages(
+    messages: List[Dict[str, Any]], max_chars: int
+) -> List[Dict[str, Any]]:
+    """
+    只保留消息中用于审查的字段，并截断过长的内容
+    
+    多模态消息只保留文本部分（图片等通常是很大的base64数据），
+    避免在请求路径上编码和写入大量数据
+    """
+    projected = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "\n".join(
+                part.get("text") or ""
+                for part in content
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+        elif not isinstance(content, str):
+            content = str(content)
+        
+        item = {"role": message.get("role"), "content": content[:max_chars]}
+        if "type" in message:
+            item["type"] = message["type"]
+        if len(content) > max_chars:
+            item["truncated"] = True
+        projected.append(item)
+    return projected
+
+
+def _dumps_line(entry: Dict[str, Any]) -> bytes:
+    """将日志条目编码为一行UTF-8 JSON（含换行符）"""
+    try:
+        return orjson.dumps(entry, option=_ORJSON_OPTIONS)
+    except TypeError:
+        # orjson 不支持的值（如超出64位的整数）退回标准库编码
+        return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
 
 class RequestLogger:
     """用于记录API请求详情的日志器"""
     
-    def __init__(self, log_dir: str = "logs/requests"):
+    def __init__(
+        self,
+        log_dir: str = "logs/requests",
+        max_content_chars: int = DEFAULT_MAX_CONTENT_CHARS,
+    ):
         """
         初始化请求日志器
         
         Args:
             log_dir: 日志目录路径
+            max_content_chars: 每条消息记录的最大内容长度，超出部分被截断
         """
         self.log_dir = Path(log_dir)
+        self.max_content_chars = max_content_chars
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self._lock = Lock()
         
-        # 创建当前月份的日志文件
+        # 创建当前小时的日志分片
         self.current_log_file = self._get_current_log_file()
+        # 写入线程缓存的 "YYYY-MM-DDTHH" 和对应分片，用于判断是否需要切换日志文件
+        self._current_hour: Optional[str] = None
+        self._write_file: Optional[Path] = None
+        
+        # 日志条目先进入队列，由后台线程批量写入，请求线程不再等待文件IO
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._fh: Optional[BinaryIO] = None
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="request-log-writer", daemon=True
+        )
+        self._writer.start()
+        # 进程退出前写完队列中剩余的日志
+        atexit.register(self.close)
         
         logger.info(f"RequestLogger initialized. Log directory: {self.log_dir}")
         logger.info(f"Current log file: {self.current_log_file}")
     
-    def _get_current_log_file(self) -> Path:
+    def _get_current_log_file(self, now: Optional[datetime] = None) -> Path:
         """
-        获取当前月份的日志文件路径
-        格式: requests_YYYY_MM.jsonl
+        获取当前小时的日志文件路径
+        格式: YYYY/MM/DD/HH.jsonl（相对于日志目录）
         """
-        now = datetime.now()
-        filename = f"requests_{now.year}_{now.month:02d}.jsonl"
-        return self.log_dir / filename
+        return self._get_shard_path(now or datetime.now())
+    
+    def _get_shard_path(self, hour: datetime) -> Path:
+        """获取指定时间所在小时的日志分片路径"""
+        return self.log_dir / hour.strftime("%Y/%m/%d/%H.jsonl")
     
-    def _ensure_log_file_exists(self):
-        """确保日志文件存在，如果月份变化则创建新文件"""
-        current_file = self._get_current_log_file()
-        if current_file != self.current_log_file:
-            self.current_log_file = current_file
+    def _ensure_log_file_exists(self, hour: str) -> bool:
+        """
+        确保指定小时的分片文件存在，小时与上一批相同时直接返回，不访问文件系统
+        
+        Args:
+            hour: 条目时间戳的 "YYYY-MM-DDTHH" 前缀
+        
+        Returns:
+            是否切换到了另一个日志文件（需要重新打开文件句柄）
+        """
+        if hour == self._current_hour:
+            return False
+        self._current_hour = hour
+        
+        try:
+            shard_time = datetime.strptime(hour, "%Y-%m-%dT%H")
+        except ValueError:
+            shard_time = datetime.now()
+        self._write_file = self._get_shard_path(shard_time)
+        
+        # 跨整点时上一小时的条目可能晚于新小时的条目写入，current_log_file 只向后移动
+        if self._write_file > self.current_log_file:
+            self.current_log_file = self._write_file
             logger.info(f"Rotating to new log file: {self.current_log_file}")
         
-        # 创建空文件（如果不存在）
-        if not self.current_log_file.exists():
-            self.current_log_file.touch()
-            logger.info(f"Created new log file: {self.current_log_file}")
+        # 创建分片目录和空文件（如果不存在）
+        self._write_file.parent.mkdir(parents=True, exist_ok=True)
+        if not self._write_file.exists():
+            self._write_file.touch()
+            logger.info(f"Created new log file: {self._write_file}")
+        return True
     
     def log_request(
         self,
@@ -77,8 +199,9 @@ class RequestLogger:
         Returns:
             request_id: 请求ID，用于后续记录响应
         """
-        timestamp = datetime.now().isoformat()
-        request_id = f"{thread_id}_{timestamp}"
+        timestamp = fast_now()
+        # 纳秒时间戳后缀，同一线程的突发请求也不会产生重复ID
+        request_id = f"{thread_id}_{time.time_ns()}"
         
         log_entry = {
             "request_id": request_id,
@@ -86,7 +209,7 @@ class RequestLogger:
             "timestamp": timestamp,
             "type": "request",
             "user_query": user_query,
-            "messages": messages,
+            "messages": _project_messages(messages, self.max_content_chars),
             "metadata": request_metadata or {},
         }
         
@@ -111,7 +234,7 @@ class RequestLogger:
             prompt: Prompt内容
             prompt_metadata: Prompt元数据
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = fast_now()
         
         log_entry = {
             "request_id": request_id,
@@ -141,7 +264,7 @@ class RequestLogger:
             intermediate_results: 中间结果列表
             response_metadata: 响应元数据
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = fast_now()
         
         log_entry = {
             "request_id": request_id,
@@ -169,7 +292,7 @@ class RequestLogger:
             error_message: 错误消息
             error_details: 错误详情
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = fast_now()
         
         log_entry = {
             "request_id": request_id,
@@ -202,7 +325,7 @@ class RequestLogger:
             agent_name: Agent名称
             feedback_metadata: 反馈元数据
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = fast_now()
         
         log_entry = {
             "request_id": request_id,
@@ -220,21 +343,93 @@ class RequestLogger:
     
     def _write_log_entry(self, entry: Dict[str, Any]):
         """
-        写入日志条目到文件（JSONL格式）
-        使用锁确保线程安全
+        将日志条目编码为JSONL行后放入写入队列，由后台线程批量写入文件
+        
+        编码在调用线程中完成：写入线程只负责文件IO，
+        且日志内容固定为调用时的状态，不受之后对entry的修改影响
         """
-        with self._lock:
-            try:
-                self._ensure_log_file_exists()
-                
+        if self._closed:
+            logger.warning("RequestLogger is closed, dropping log entry")
+            return
+        try:
+            line = _dumps_line(entry)
+        except Exception as e:
+            logger.error(f"Failed to serialize log entry: {e}")
+            logger.error(f"Entry: {entry}")
+            return
+        # 按条目自身的时间戳选择小时分片：整点前记录、整点后才写入的条目仍落在所属小时
+        timestamp = entry.get("timestamp")
+        if not (isinstance(timestamp, str) and len(timestamp) >= 13):
+            timestamp = fast_now()
+        self._queue.put((timestamp[:13], line))
+    
+    def _writer_loop(self):
+        """后台写入线程：批量取出已编码的日志行，一次写入文件"""
+        running = True
+        while running:
+            # 阻塞等待第一条，再取出此刻队列中已有的条目组成一批
+            batch = [self._queue.get()]
+            while len(batch) < WRITER_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            lines = []
+            waiters = []
+            for item in batch:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(item)
+            
+            # 按所属小时分组写入，组内保持入队顺序
+            for hour, group in itertools.groupby(lines, key=itemgetter(0)):
+                self._write_lines(hour, [line for _, line in group])
+            for waiter in waiters:
+                waiter.set()
+        
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+    
+    def _write_lines(self, hour: str, lines: List[bytes]):
+        """在写入线程中把同一小时的一批JSON行写入对应的分片文件"""
+        try:
+            if self._ensure_log_file_exists(hour) or self._fh is None:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
                 # 追加模式写入，确保不会删除现有日志
-                with open(self.current_log_file, "a", encoding="utf-8") as f:
-                    json_line = json.dumps(entry, ensure_ascii=False)
-                    f.write(json_line + "\n")
-                
-            except Exception as e:
-                logger.error(f"Failed to write log entry: {e}")
-                logger.error(f"Entry: {entry}")
+                self._fh = open(self._write_file, "ab", buffering=1 << 16)
+            self._fh.write(b"".join(lines))
+            self._fh.flush()
+        except Exception as e:
+            logger.error(f"Failed to write {len(lines)} log entries: {e}")
+    
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        等待队列中已有的日志条目全部写入文件
+        
+        Returns:
+            是否在超时前完成写入
+        """
+        if self._closed or not self._writer.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout: Optional[float] = 5.0):
+        """写完剩余日志并停止后台写入线程"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
     
     def get_log_files(self) -> List[Path]:
         """
@@ -243,52 +438,159 @@ class RequestLogger:
         Returns:
             日志文件路径列表，按时间排序（最新的在前）
         """
+        # 小时分片 YYYY/MM/DD/HH.jsonl，以及旧版按月的 requests_YYYY_MM.jsonl
         log_files = sorted(
-            self.log_dir.glob("requests_*.jsonl"),
+            [
+                *self.log_dir.glob("*/*/*/*.jsonl"),
+                *self.log_dir.glob("requests_*.jsonl"),
+            ],
             key=lambda p: p.stat().st_mtime,
             reverse=True
         )
         return log_files
     
+    def get_shards(self, start: datetime, end: Optional[datetime] = None) -> List[Path]:
+        """
+        获取时间范围内存在的小时分片，按时间先后排序
+        
+        Args:
+            start: 开始时间
+            end: 结束时间，默认为当前时间
+        
+        Returns:
+            分片文件路径列表（只包含实际存在的文件）
+        """
+        end = end or datetime.now()
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        shards = []
+        while hour <= end:
+            path = self._get_shard_path(hour)
+            if path.exists():
+                shards.append(path)
+            hour += timedelta(hours=1)
+        return shards
+    
     def read_logs(
         self,
         limit: Optional[int] = None,
         log_file: Optional[Path] = None,
+        tail: bool = False,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
     ) -> List[Dict[str, Any]]:
         """
         读取日志条目
         
         Args:
             limit: 限制返回条目数量
-            log_file: 指定日志文件，默认读取当前文件
+            log_file: 指定日志文件，默认读取当前小时的文件
+            tail: 为True时返回最后limit条（从文件末尾反向读取，不扫描整个文件）
+            start: 指定时读取 start 到 end 之间所有小时分片（忽略 log_file）
+            end: 时间范围的结束时间，默认为当前时间
         
         Returns:
             日志条目列表
         """
-        target_file = log_file or self.current_log_file
+        # 先等待后台线程写完已提交的条目
+        self.flush()
         
+        if start is not None:
+            return self._read_shards(self.get_shards(start, end), limit, tail)
+        
+        target_file = log_file or self.current_log_file
         if not target_file.exists():
             logger.warning(f"Log file does not exist: {target_file}")
             return []
         
-        entries = []
-        try:
-            with open(target_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            entry = json.loads(line)
-                            entries.append(entry)
-                            
-                            if limit and len(entries) >= limit:
-                                break
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse log line: {e}")
-                            continue
-        except Exception as e:
-            logger.error(f"Failed to read log file: {e}")
+        if tail and limit:
+            try:
+                return _parse_lines(_tail_lines(target_file, limit))
+            except Exception as e:
+                logger.error(f"Failed to read log file: {e}")
+                return []
+        
+        return _read_head(target_file, limit)
+    
+    def _read_shards(
+        self, shards: List[Path], limit: Optional[int], tail: bool
+    ) -> List[Dict[str, Any]]:
+        """按时间顺序读取多个分片；tail时从最新的分片反向读取"""
+        if not (tail and limit):
+            entries = []
+            for shard in shards:
+                remaining = limit - len(entries) if limit else None
+                entries.extend(_read_head(shard, remaining))
+                if limit and len(entries) >= limit:
+                    break
+            return entries
         
-        return entries
+        lines: List[bytes] = []
+        for shard in reversed(shards):
+            try:
+                lines[:0] = _tail_lines(shard, limit - len(lines))
+            except Exception as e:
+                logger.error(f"Failed to read log file {shard}: {e}")
+            if len(lines) >= limit:
+                break
+        return _parse_lines(lines)
+
+
+def _read_head(path: Path, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """从文件开头顺序读取日志条目，最多limit条"""
+    entries = []
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        entry = orjson.loads(line)
+                        entries.append(entry)
+                        
+                        if limit and len(entries) >= limit:
+                            break
+                    except orjson.JSONDecodeError as e:
+                        logger.error(f"Failed to parse log line: {e}")
+                        continue
+    except Exception as e:
+        logger.error(f"Failed to read log file: {e}")
+    
+    return entries
+
+
+def _tail_lines(path: Path, n: int) -> List[bytes]:
+    """
+    通过mmap从文件末尾反向查找换行符，返回最后n个非空行
+    读取量与n成正比，而不是与文件大小成正比
+    """
+    if n <= 0:
+        return []
+    
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = []
+            end = len(mm)
+            while end > 0 and len(lines) < n:
+                newline = mm.rfind(b"\n", 0, end)
+                line = mm[newline + 1:end]
+                if line.strip():
+                    lines.append(line)
+                end = max(newline, 0)
+    
+    lines.reverse()
+    return lines
+
+
+def _parse_lines(lines: List[bytes]) -> List[Dict[str, Any]]:
+    """解析JSONL行，跳过无法解析的行"""
+    entries = []
+    for line in lines:
+        try:
+            entries.append(orjson.loads(line))
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse log line: {e}")
+    return entries
 
 
 # 全局单例实例
@@ -307,7 +609,13 @@ def get_request_logger() -> RequestLogger:
     if _request_logger is None:
         # 从环境变量读取日志目录，默认为 logs/requests
         log_dir = os.getenv("REQUEST_LOG_DIR", "logs/requests")
-        _request_logger = RequestLogger(log_dir=log_dir)
+        # 非法值退回默认值，并保证至少保留1个字符
+        max_content_chars = max(
+            1, get_int_env("REQUEST_LOG_MAX_CONTENT", DEFAULT_MAX_CONTENT_CHARS)
+        )
+        _request_logger = RequestLogger(
+            log_dir=log_dir, max_content_chars=max_content_chars
+        )
     
     return _request_logger
 
@@ -5,16 +5,20 @@
 """
 
 import asyncio
-import json
 import sys
 
+# SSE data 字段前缀和结束标记
+_DATA = b"data: "
+_DONE = b"[DONE]"
+
 
 async def test_api():
     """测试 API 端点"""
     try:
         import httpx
+        import orjson
     except ImportError:
-        print("❌ 需要安装 httpx: pip install httpx")
+        print("❌ 需要安装 httpx 和 orjson: pip install httpx orjson")
         sys.exit(1)
     
     print("=" * 80)
@@ -41,12 +45,18 @@ async def test_api():
         },
     ]
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"\n{'=' * 80}")
-        print(f"{test_case['name']}")
-        print(f"{'=' * 80}")
-        print(f"查询: {test_case['query']}")
-        print("-" * 80)
+    async def _run_case(client, i, test_case):
+        """执行单个测试用例，输出写入独立缓冲区，返回 (输出行, 是否连接失败)"""
+        out = []
+
+        def emit(*args):
+            out.append(" ".join(str(a) for a in args))
+
+        emit(f"\n{'=' * 80}")
+        emit(f"{test_case['name']}")
+        emit(f"{'=' * 80}")
+        emit(f"查询: {test_case['query']}")
+        emit("-" * 80)
         
         # 构造请求
         request_data = {
@@ -62,86 +72,111 @@ async def test_api():
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                print("\n🚀 发送请求...")
+            emit("\n🚀 发送请求...")
+            
+            async with client.stream("POST", api_url, json=request_data) as response:
+                if response.status_code != 200:
+                    emit(f"❌ 请求失败，状态码: {response.status_code}")
+                    error_text = await response.aread()
+                    emit(f"错误信息: {error_text.decode()}")
+                    return out, False
+                
+                emit("✅ 请求成功，接收流式响应...\n")
                 
-                async with client.stream("POST", api_url, json=request_data) as response:
-                    if response.status_code != 200:
-                        print(f"❌ 请求失败，状态码: {response.status_code}")
-                        error_text = await response.aread()
-                        print(f"错误信息: {error_text.decode()}")
-                        continue
-                    
-                    print("✅ 请求成功，接收流式响应...\n")
-                    
-                    # 收集完整响应
-                    full_response = []
-                    event_count = 0
-                    
-                    async for line in response.aiter_lines():
-                        if not line.strip():
+                # 收集完整响应
+                full_response = []
+                event_count = 0
+                
+                # 按 SSE 事件边界（空行）切分字节流，避免逐行字符串处理
+                buf = bytearray()
+                done = False
+                async for chunk in response.aiter_bytes():
+                    buf += chunk
+                    while (idx := buf.find(b"\n\n")) != -1:
+                        # 空事件直接丢弃，不复制字节
+                        if idx == 0:
+                            del buf[:2]
+                            continue
+                        event = bytes(buf[:idx])
+                        del buf[:idx + 2]
+                        
+                        # 解析 SSE 的 data 字段
+                        data = event.partition(_DATA)[2]
+                        if not data:
                             continue
                         
-                        # 解析 SSE 格式
-                        if line.startswith("data: "):
-                            data = line[6:]  # 移除 "data: " 前缀
+                        if data == _DONE:
+                            emit("\n✅ 流式响应完成")
+                            done = True
+                            break
+                        
+                        try:
+                            event_data = orjson.loads(data)
+                            event_type = event_data.get("event", "unknown")
+                            event_count += 1
                             
-                            if data == "[DONE]":
-                                print("\n✅ 流式响应完成")
-                                break
+                            # 打印事件信息
+                            if event_type == "metadata":
+                                emit(f"📋 事件 {event_count}: 元数据")
+                            elif event_type == "values":
+                                emit(f"📦 事件 {event_count}: 状态更新")
+                                if "data" in event_data and "messages" in event_data["data"]:
+                                    messages = event_data["data"]["messages"]
+                                    if messages:
+                                        last_msg = messages[-1]
+                                        content = last_msg.get("content", "")
+                                        msg_type = last_msg.get("type", "unknown")
+                                        
+                                        if content:
+                                            emit(f"   类型: {msg_type}")
+                                            emit(f"   内容: {content[:150]}...")
+                                            full_response.append(content)
+                            else:
+                                emit(f"📨 事件 {event_count}: {event_type}")
                             
-                            try:
-                                event_data = json.loads(data)
-                                event_type = event_data.get("event", "unknown")
-                                event_count += 1
-                                
-                                # 打印事件信息
-                                if event_type == "metadata":
-                                    print(f"📋 事件 {event_count}: 元数据")
-                                elif event_type == "values":
-                                    print(f"📦 事件 {event_count}: 状态更新")
-                                    if "data" in event_data and "messages" in event_data["data"]:
-                                        messages = event_data["data"]["messages"]
-                                        if messages:
-                                            last_msg = messages[-1]
-                                            content = last_msg.get("content", "")
-                                            msg_type = last_msg.get("type", "unknown")
-                                            
-                                            if content:
-                                                print(f"   类型: {msg_type}")
-                                                print(f"   内容: {content[:150]}...")
-                                                full_response.append(content)
-                                else:
-                                    print(f"📨 事件 {event_count}: {event_type}")
-                                
-                            except json.JSONDecodeError as e:
-                                print(f"⚠️  解析 JSON 失败: {e}")
-                                print(f"   原始数据: {data[:200]}...")
-                    
-                    # 打印完整响应
-                    if full_response:
-                        print("\n" + "=" * 80)
-                        print("完整响应内容:")
-                        print("=" * 80)
-                        for content in full_response:
-                            print(content)
-                            print()
-                    
-                    print(f"\n📊 统计: 共收到 {event_count} 个事件")
-                    
+                        except orjson.JSONDecodeError as e:
+                            emit(f"⚠️  解析 JSON 失败: {e}")
+                            emit(f"   原始数据: {data[:200].decode(errors='replace')}...")
+                    if done:
+                        break
+                
+                # 打印完整响应
+                if full_response:
+                    emit("\n" + "=" * 80)
+                    emit("完整响应内容:")
+                    emit("=" * 80)
+                    for content in full_response:
+                        emit(content)
+                        emit()
+                
+                emit(f"\n📊 统计: 共收到 {event_count} 个事件")
+                
         except httpx.ConnectError:
-            print("\n❌ 无法连接到后端服务")
-            print("请确保后端服务正在运行:")
-            print("  docker ps | grep deer-flow-backend")
-            print("如果服务未运行，请执行:")
-            print("  cd /home/ubuntu/deer-flow && docker-compose up -d")
-            break
+            emit("\n❌ 无法连接到后端服务")
+            return out, True
         except Exception as e:
-            print(f"\n❌ 测试失败")
-            print(f"错误类型: {type(e).__name__}")
-            print(f"错误信息: {str(e)}")
             import traceback
-            traceback.print_exc()
+            emit(f"\n❌ 测试失败")
+            emit(f"错误类型: {type(e).__name__}")
+            emit(f"错误信息: {str(e)}")
+            emit(traceback.format_exc())
+        return out, False
+    
+    # 所有用例共享同一个客户端（连接池复用），并发执行
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        results = await asyncio.gather(
+            *[_run_case(client, i, tc) for i, tc in enumerate(test_cases, 1)]
+        )
+    
+    # 按用例顺序输出，避免并发打印交错
+    for out, _ in results:
+        print("\n".join(out))
+    
+    if any(connect_failed for _, connect_failed in results):
+        print("请确保后端服务正在运行:")
+        print("  docker ps | grep deer-flow-backend")
+        print("如果服务未运行，请执行:")
+        print("  cd /home/ubuntu/deer-flow && docker-compose up -d")
     
     print("\n" + "=" * 80)
     print("测试完成！")
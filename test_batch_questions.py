@@ -4,10 +4,14 @@
 """
 
 import asyncio
-import json
+import io
 import logging
+import sys
+import time
 import httpx
+import orjson
 from datetime import datetime
+from typing import NamedTuple
 
 # 配置日志
 logging.basicConfig(
@@ -16,46 +20,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 同时进行的问题测试数量上限
+MAX_CONCURRENCY = 4
+
+# HTTP 客户端配置：连接阶段快速失败，流式读取保留较长超时
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+
+# 流式响应每次读取的字节数
+SSE_CHUNK_SIZE = 65536
+
+# SSE 帧分隔符、data 字段前缀、结束标记和 content 字段名
+_EVENT_END = b"\n\n"
+_DATA = b"data: "
+_DONE = b"[DONE]"
+_CONTENT_KEY = b'"content"'
+
+
+class _StdoutBatcher:
+    """合并高频的流式输出，累计超过字符阈值或时间间隔后再批量写入 stdout"""
+
+    def __init__(self, max_chars=512, interval=0.05):
+        self.max_chars = max_chars
+        self.interval = interval
+        self._pending = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text):
+        self._pending.append(text)
+        self._size += len(text)
+        now = time.monotonic()
+        if self._size > self.max_chars or now - self._last_flush > self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self._pending:
+            sys.stdout.write("".join(self._pending))
+            sys.stdout.flush()
+            self._pending.clear()
+            self._size = 0
+        self._last_flush = now if now is not None else time.monotonic()
+
+
+class Question(NamedTuple):
+    """单个测试问题"""
+    id: int
+    name: str
+    question: str
+
 
 # 测试问题列表
-TEST_QUESTIONS = [
-    {
-        "id": 1,
-        "name": "藕汤腥味问题",
-        "question": "今天店里的藕汤有点腥，这是什么原因怎么解决？"
-    }
-#     {
-#         "id": 2,
-#         "name": "猪肝炒制问题",
-#         "question": "店里面师傅今天猪肝炒的不好，应该怎么复盘调整"
-#     },
-#     {
-#         "id": 3,
-#         "name": "藕汤浓度问题",
-#         "question": "今天店里面的藕汤不够浓，是什么原因"
-#     },
-#     {
-#         "id": 4,
-#         "name": "藕汤咸度问题",
-#         "question": "今天店里面的藕汤太咸了，是什么原因，如何排查"
-#     }
-]
-
-
-async def test_single_question(question_data, api_url):
-    """测试单个问题"""
-    question_id = question_data["id"]
-    question_name = question_data["name"]
-    question_text = question_data["question"]
+TEST_QUESTIONS = (
+    Question(1, "藕汤腥味问题", "今天店里的藕汤有点腥，这是什么原因怎么解决？"),
+    # Question(2, "猪肝炒制问题", "店里面师傅今天猪肝炒的不好，应该怎么复盘调整"),
+    # Question(3, "藕汤浓度问题", "今天店里面的藕汤不够浓，是什么原因"),
+    # Question(4, "藕汤咸度问题", "今天店里面的藕汤太咸了，是什么原因，如何排查"),
+)
+
+
+async def test_single_question(client, question_data, api_url, out=None):
+    """
+    测试单个问题
     
-    print("\n" + "=" * 80)
-    print(f"测试 {question_id}/{len(TEST_QUESTIONS)}: {question_name}")
-    print("=" * 80)
-    print(f"问题: {question_text}")
-    print("-" * 80)
+    Args:
+        out: 输出缓冲区。为 None 时直接写 stdout 并实时回显 token；
+            并发执行多个问题时传入独立缓冲区，避免不同问题的输出交错
+    """
+    question_id, question_name, question_text = question_data
+    live = out is None
+    if live:
+        out = sys.stdout
+
+    def emit(*args):
+        print(*args, file=out)
     
-    # 构造测试请求
-    thread_id = f"test_batch_{question_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    emit("\n" + "=" * 80)
+    emit(f"测试 {question_id}/{len(TEST_QUESTIONS)}: {question_name}")
+    emit("=" * 80)
+    emit(f"问题: {question_text}")
+    emit("-" * 80)
+    
+    # 构造测试请求（开始时间只取一次，thread_id 复用）
+    start_time = datetime.now()
+    thread_id = f"test_batch_{question_id}_{start_time.strftime('%Y%m%d_%H%M%S')}"
     request_data = {
         "messages": [
             {
@@ -68,82 +116,109 @@ async def test_single_question(question_data, api_url):
         "locale": "zh-CN",
     }
     
-    start_time = datetime.now()
-    print(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    emit(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            full_response = []
-            event_count = 0
+        # 增量写入响应文本，字数单独计数，无需为统计长度拼接字符串
+        response_buf = io.StringIO()
+        char_count = 0
+        event_count = 0
+        
+        async with client.stream("POST", api_url, json=request_data) as response:
+            if response.status_code != 200:
+                emit(f"\n❌ 请求失败，状态码: {response.status_code}")
+                error_text = await response.aread()
+                emit(f"错误信息: {error_text.decode()}")
+                return None
+            
+            emit("\n响应内容:")
+            emit("-" * 80)
             
-            async with client.stream("POST", api_url, json=request_data) as response:
-                if response.status_code != 200:
-                    print(f"\n❌ 请求失败，状态码: {response.status_code}")
-                    error_text = await response.aread()
-                    print(f"错误信息: {error_text.decode()}")
-                    return None
-                
-                print("\n响应内容:")
-                print("-" * 80)
-                
-                async for line in response.aiter_lines():
-                    if not line.strip():
+            # 按 SSE 事件边界（空行）切分字节流，只对 data 字段做 JSON 解析
+            buf = bytearray()
+            done = False
+            # 实时模式下合并高频 token 输出；缓冲模式直接写入本问题的缓冲区
+            tokens = _StdoutBatcher() if live else out
+            # JSON 解析错误只计数并记录第一条，流结束后汇总输出一次
+            err_count = 0
+            first_err = None
+            async for chunk in response.aiter_bytes(chunk_size=SSE_CHUNK_SIZE):
+                buf.extend(chunk)
+                while (end := buf.find(_EVENT_END)) != -1:
+                    # 在缓冲区内定位 data 字段，通过 memoryview 切片直接解析，不复制字节
+                    start = buf.find(_DATA, 0, end)
+                    event_data = None
+                    if start != -1:
+                        with memoryview(buf)[start + len(_DATA):end] as data:
+                            if data == _DONE:
+                                done = True
+                            elif buf.find(_CONTENT_KEY, start + len(_DATA), end) == -1:
+                                # 不含 content 字段的事件只计数，跳过 JSON 解析
+                                if len(data):
+                                    event_count += 1
+                            else:
+                                try:
+                                    event_data = orjson.loads(data)
+                                except orjson.JSONDecodeError as e:
+                                    err_count += 1
+                                    if first_err is None:
+                                        first_err = str(e)
+                    del buf[:end + len(_EVENT_END)]
+                    
+                    if done:
+                        break
+                    if event_data is None:
                         continue
                     
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        
-                        if data == "[DONE]":
-                            break
-                        
-                        try:
-                            event_data = json.loads(data)
-                            event_count += 1
-                            
-                            if "content" in event_data:
-                                content = event_data["content"]
-                                if content:
-                                    print(content, end='', flush=True)
-                                    full_response.append(content)
-                        
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"JSON 解析错误: {e}")
-            
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            print("\n" + "-" * 80)
-            print(f"✅ 测试完成")
-            print(f"结束时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"耗时: {duration:.1f} 秒")
-            
-            if full_response:
-                final_text = ''.join(full_response)
-                print(f"响应字数: {len(final_text)}")
-                print(f"事件数量: {event_count}")
-                return {
-                    "question_id": question_id,
-                    "question_name": question_name,
-                    "question_text": question_text,
-                    "response": final_text,
-                    "duration": duration,
-                    "event_count": event_count,
-                    "success": True
-                }
-            else:
-                print("⚠️  未收集到响应内容")
-                return {
-                    "question_id": question_id,
-                    "question_name": question_name,
-                    "question_text": question_text,
-                    "success": False,
-                    "error": "No response collected"
-                }
+                    event_count += 1
+                    if "content" in event_data:
+                        content = event_data["content"]
+                        if content:
+                            tokens.write(content)
+                            response_buf.write(content)
+                            char_count += len(content)
+                if done:
+                    break
+            if live:
+                tokens.flush()
+            if err_count:
+                logger.warning("JSON 解析错误 %d 次，首个错误: %s", err_count, first_err)
+        
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        
+        emit("\n" + "-" * 80)
+        emit(f"✅ 测试完成")
+        emit(f"结束时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        emit(f"耗时: {duration:.1f} 秒")
+        
+        if char_count:
+            emit(f"响应字数: {char_count}")
+            emit(f"事件数量: {event_count}")
+            return {
+                "question_id": question_id,
+                "question_name": question_name,
+                "question_text": question_text,
+                "response": response_buf.getvalue(),
+                "char_count": char_count,
+                "duration": duration,
+                "event_count": event_count,
+                "success": True
+            }
+        else:
+            emit("⚠️  未收集到响应内容")
+            return {
+                "question_id": question_id,
+                "question_name": question_name,
+                "question_text": question_text,
+                "success": False,
+                "error": "No response collected"
+            }
     
     except httpx.ConnectError:
-        print("\n❌ 无法连接到后端服务")
-        print("请确保后端服务正在运行:")
-        print("  docker ps | grep deer-flow-backend")
+        emit("\n❌ 无法连接到后端服务")
+        emit("请确保后端服务正在运行:")
+        emit("  docker ps | grep deer-flow-backend")
         return {
             "question_id": question_id,
             "success": False,
@@ -151,7 +226,7 @@ async def test_single_question(question_data, api_url):
         }
     
     except httpx.ReadTimeout:
-        print("\n❌ 请求超时")
+        emit("\n❌ 请求超时")
         return {
             "question_id": question_id,
             "success": False,
@@ -159,7 +234,7 @@ async def test_single_question(question_data, api_url):
         }
     
     except Exception as e:
-        print(f"\n❌ 测试失败: {type(e).__name__}: {str(e)}")
+        emit(f"\n❌ 测试失败: {type(e).__name__}: {str(e)}")
         logger.error("测试失败", exc_info=True)
         return {
             "question_id": question_id,
@@ -168,6 +243,18 @@ async def test_single_question(question_data, api_url):
         }
 
 
+def write_results_file(path, header, results):
+    """逐条流式写出结果 JSON，不在内存中构造包含全部响应的完整文档"""
+    with open(path, 'wb') as f:
+        # 头部字段写成对象前缀，留出 results 数组
+        f.write(orjson.dumps(header, option=orjson.OPT_NON_STR_KEYS)[:-1])
+        f.write(b',"results":[')
+        for i, result in enumerate(results):
+            f.write(b"\n" if i == 0 else b",\n")
+            f.write(orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS))
+        f.write(b"\n]}\n")
+
+
 async def main():
     """主函数"""
     print("\n" + "=" * 80)
@@ -179,18 +266,28 @@ async def main():
     print(f"API URL: {api_url}")
     
     overall_start = datetime.now()
-    results = []
     
-    # 逐个测试问题
-    for question_data in TEST_QUESTIONS:
-        result = await test_single_question(question_data, api_url)
-        if result:
-            results.append(result)
+    # 并发测试所有问题：共享一个客户端复用连接池，用信号量限制并发数
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    
+    # 同一时间只有一个问题在执行时实时回显 token；否则每个问题写入独立缓冲区，
+    # 全部完成后按顺序输出，避免不同问题的输出交错（此时不再实时回显）
+    live = MAX_CONCURRENCY == 1 or len(TEST_QUESTIONS) == 1
+    outputs = [None if live else io.StringIO() for _ in TEST_QUESTIONS]
+    
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS) as client:
+        async def _bounded(question_data, out):
+            async with sem:
+                return await test_single_question(client, question_data, api_url, out)
         
-        # 在问题之间稍作停顿
-        if question_data["id"] < len(TEST_QUESTIONS):
-            print("\n⏸️  等待 2 秒后继续下一个测试...")
-            await asyncio.sleep(2)
+        results = await asyncio.gather(
+            *[_bounded(question_data, out) for question_data, out in zip(TEST_QUESTIONS, outputs)]
+        )
+    
+    if not live:
+        for out in outputs:
+            sys.stdout.write(out.getvalue())
+    results = [result for result in results if result]
     
     overall_end = datetime.now()
     total_duration = (overall_end - overall_start).total_seconds()
@@ -202,35 +299,45 @@ async def main():
     print(f"总测试时间: {total_duration:.1f} 秒")
     print(f"测试问题数: {len(TEST_QUESTIONS)}")
     
-    success_count = sum(1 for r in results if r.get("success", False))
+    # 单次遍历结果：同时统计成功数、总字数并生成明细
+    success_count = 0
+    total_chars = 0
+    details = []
+    for result in results:
+        if result.get("success"):
+            success_count += 1
+            total_chars += result["char_count"]
+            details.append(
+                f"\n✅ 测试 {result['question_id']}: {result['question_name']}\n"
+                f"   耗时: {result['duration']:.1f}秒\n"
+                f"   字数: {result['char_count']}\n"
+                f"   事件: {result['event_count']}"
+            )
+        else:
+            details.append(
+                f"\n❌ 测试 {result.get('question_id', '?')}: 失败\n"
+                f"   错误: {result.get('error', 'Unknown error')}"
+            )
+    
     print(f"成功: {success_count}")
     print(f"失败: {len(results) - success_count}")
+    print(f"总字数: {total_chars}")
     
     if success_count > 0:
         print("\n详细结果:")
         print("-" * 80)
-        for result in results:
-            if result.get("success"):
-                print(f"\n✅ 测试 {result['question_id']}: {result['question_name']}")
-                print(f"   耗时: {result['duration']:.1f}秒")
-                print(f"   字数: {len(result['response'])}")
-                print(f"   事件: {result['event_count']}")
-            else:
-                print(f"\n❌ 测试 {result.get('question_id', '?')}: 失败")
-                print(f"   错误: {result.get('error', 'Unknown error')}")
+        print("\n".join(details))
     
     # 保存详细结果到文件
-    output_file = f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output_file = f"test_results_{overall_end.strftime('%Y%m%d_%H%M%S')}.json"
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "timestamp": overall_start.isoformat(),
-                "total_duration": total_duration,
-                "results": results
-            }, f, ensure_ascii=False, indent=2)
+        write_results_file(output_file, {
+            "timestamp": overall_start.isoformat(),
+            "total_duration": total_duration,
+        }, results)
         print(f"\n📄 详细结果已保存到: {output_file}")
     except Exception as e:
-        logger.error(f"保存结果文件失败: {e}")
+        logger.error("保存结果文件失败: %s", e)
     
     print("\n" + "=" * 80)
     print("测试完成！")
@@ -238,6 +345,13 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 可选：安装了 uvloop 时使用其事件循环，未安装则保持默认
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -12,61 +12,78 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.tools.bm25_search import bm25_search_tool, bm25_health_check_tool, bm25_stats_tool, bm25_database_info_tool
+async def _ainvoke_concurrently(calls):
+    """在同一事件循环中并发调用多个工具，按提交顺序返回 (结果, 异常) 列表"""
+    async def _run(tool, tool_input):
+        try:
+            return await tool.ainvoke(tool_input), None
+        except Exception as e:
+            return None, e
+    
+    return await asyncio.gather(
+        *[_run(tool, tool_input) for tool, tool_input in calls]
+    )
 
 def test_bm25_tools():
     """测试BM25工具功能"""
+    # 延迟导入：BM25服务不可用时 main() 可以在健康检查处快速退出，无需加载项目依赖
+    from src.tools.bm25_search import bm25_search_tool, bm25_health_check_tool, bm25_stats_tool, bm25_database_info_tool
+    
     print("🧪 BM25工具集成测试")
     print("=" * 50)
     
+    test_queries = [
+        "藕汤",
+        "筒骨煨藕汤",
+        "铫子筒骨煨藕汤产品标准"
+    ]
+    
+    # 所有工具调用都是独立的网络请求，在一个事件循环中并发执行后按原顺序输出；
+    # 搜索走工具的异步路径，复用共享的 httpx.AsyncClient 连接池
+    calls = [
+        (bm25_health_check_tool, {}),
+        (bm25_stats_tool, {}),
+        (bm25_database_info_tool, {}),
+    ] + [(bm25_search_tool, query) for query in test_queries]
+    health, stats, db_info, *searches = asyncio.run(_ainvoke_concurrently(calls))
+    
     # 测试健康检查
     print("\n🔍 测试健康检查工具...")
-    try:
-        health_result = bm25_health_check_tool.invoke()
-        print("✅ 健康检查结果:")
-        print(health_result)
-    except Exception as e:
-        print(f"❌ 健康检查失败: {e}")
+    health_result, error = health
+    if error:
+        print(f"❌ 健康检查失败: {error}")
         return False
+    print("✅ 健康检查结果:")
+    print(health_result)
     
     # 测试统计信息
     print("\n📊 测试统计信息工具...")
-    try:
-        stats_result = bm25_stats_tool.invoke()
-        print("✅ 统计信息结果:")
-        print(stats_result)
-    except Exception as e:
-        print(f"❌ 统计信息获取失败: {e}")
+    stats_result, error = stats
+    if error:
+        print(f"❌ 统计信息获取失败: {error}")
         return False
+    print("✅ 统计信息结果:")
+    print(stats_result)
     
     # 测试数据库信息工具
     print("\n📚 测试数据库信息工具...")
-    try:
-        db_info_result = bm25_database_info_tool.invoke()
-        print("✅ 数据库信息结果:")
-        print(db_info_result)
-    except Exception as e:
-        print(f"❌ 数据库信息获取失败: {e}")
+    db_info_result, error = db_info
+    if error:
+        print(f"❌ 数据库信息获取失败: {error}")
         return False
+    print("✅ 数据库信息结果:")
+    print(db_info_result)
     
     # 测试搜索功能
     print("\n🔍 测试搜索工具...")
-    test_queries = [
-        "藕汤",
-        "筒骨煨藕汤",
-        "铫子筒骨煨藕汤产品标准"
-    ]
-    
-    for query in test_queries:
+    for query, (search_result, error) in zip(test_queries, searches):
         print(f"\n搜索: '{query}'")
-        try:
-            search_result = bm25_search_tool.invoke(query)
-            print("✅ 搜索结果:")
-            print(search_result)
-            print("-" * 30)
-        except Exception as e:
-            print(f"❌ 搜索失败: {e}")
+        if error:
+            print(f"❌ 搜索失败: {error}")
             return False
+        print("✅ 搜索结果:")
+        print(search_result)
+        print("-" * 30)
     
     return True
 
@@ -150,8 +167,9 @@ def main():
     # 检查BM25服务是否运行
     print("📡 检查BM25服务状态...")
     try:
-        import requests
-        response = requests.get("http://localhost:5003/health", timeout=5)
+        import httpx
+        with httpx.Client(timeout=5.0) as client:
+            response = client.get("http://localhost:5003/health")
         if response.status_code == 200:
             print("✅ BM25服务运行正常")
         else:
@@ -26,26 +26,29 @@ class MessagesState(TypedDict):
 def create_test_graph_with_collection():
     """创建一个测试图：节点内部收集所有 chunk（当前实现方式）"""
     
-    def llm_node_with_collection(state: MessagesState):
+    async def llm_node_with_collection(state: MessagesState):
         """模拟当前 reporter_node/simple_researcher_node 的实现"""
         print("  → [节点] 开始执行...")
         llm = get_llm_by_type("basic")
         messages = [HumanMessage(content="count to 5 quickly")]
         
-        response_content = ""
+        parts = []
         chunk_count = 0
-        start = time.time()
+        start = time.monotonic()
         
-        # ❌ 当前实现：先收集所有内容
-        for chunk in llm.stream(messages):
-            if hasattr(chunk, "content") and chunk.content:
-                response_content += chunk.content
+        # 先收集所有内容；使用 astream 避免同步流阻塞事件循环，
+        # LangGraph 可以在生成过程中产出 on_chat_model_stream 事件
+        async for chunk in llm.astream(messages):
+            content = getattr(chunk, "content", None)
+            if content:
+                parts.append(content)
                 chunk_count += 1
         
-        elapsed = time.time() - start
+        elapsed = time.monotonic() - start
         print(f"  → [节点] 收集完成：{chunk_count} chunks，耗时 {elapsed:.2f}s")
         print(f"  → [节点] 返回完整消息...")
         
+        response_content = "".join(parts)
         return {"messages": [AIMessage(content=response_content)]}
     
     graph = StateGraph(MessagesState)
@@ -85,7 +88,7 @@ async def test_astream_events_v2(graph, test_name):
     print(f"测试：{test_name} - 使用 astream_events(version='v2')")
     print("=" * 70)
     
-    start_time = time.time()
+    start_time = time.monotonic()
     event_count = 0
     message_chunk_count = 0
     
@@ -98,19 +101,19 @@ async def test_astream_events_v2(graph, test_name):
         
         # 只打印关键事件
         if event_type in ["on_chat_model_stream", "on_chat_model_end"]:
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
             data = ev.get("data", {})
             
             if event_type == "on_chat_model_stream":
                 chunk = data.get("chunk", {})
-                content = getattr(chunk, "content", "") if hasattr(chunk, "content") else chunk.get("content", "")
+                content = chunk.get("content", "") if isinstance(chunk, dict) else getattr(chunk, "content", "")
                 if content:
                     message_chunk_count += 1
                     print(f"  [{elapsed:.2f}s] on_chat_model_stream: {repr(content)}")
             elif event_type == "on_chat_model_end":
                 print(f"  [{elapsed:.2f}s] on_chat_model_end")
     
-    total_time = time.time() - start_time
+    total_time = time.monotonic() - start_time
     print()
     print(f"✅ 完成：总事件 {event_count} 个，消息 chunk {message_chunk_count} 个，耗时 {total_time:.2f}s")
     
@@ -128,7 +131,7 @@ async def test_astream_messages(graph, test_name):
     print(f"测试：{test_name} - 使用 astream(stream_mode='messages')")
     print("=" * 70)
     
-    start_time = time.time()
+    start_time = time.monotonic()
     event_count = 0
     
     async for event in graph.astream(
@@ -136,17 +139,17 @@ async def test_astream_messages(graph, test_name):
         stream_mode="messages"
     ):
         event_count += 1
-        elapsed = time.time() - start_time
         
-        # 打印收到的消息
+        # 打印收到的消息（只在需要打印时计算耗时）
         if isinstance(event, tuple) and len(event) == 2:
             msg, metadata = event
             msg_type = type(msg).__name__
-            content = getattr(msg, "content", "") if hasattr(msg, "content") else ""
+            content = getattr(msg, "content", "")
             if content:
+                elapsed = time.monotonic() - start_time
                 print(f"  [{elapsed:.2f}s] {msg_type}: {repr(content[:50])}")
     
-    total_time = time.time() - start_time
+    total_time = time.monotonic() - start_time
     print()
     print(f"✅ 完成：总事件 {event_count} 个，耗时 {total_time:.2f}s")
     
@@ -164,7 +167,7 @@ async def test_astream_values(graph, test_name):
     print(f"测试：{test_name} - 使用 astream(stream_mode='values')")
     print("=" * 70)
     
-    start_time = time.time()
+    start_time = time.monotonic()
     event_count = 0
     
     async for state in graph.astream(
@@ -172,12 +175,12 @@ async def test_astream_values(graph, test_name):
         stream_mode="values"
     ):
         event_count += 1
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         
         messages = state.get("messages", [])
         print(f"  [{elapsed:.2f}s] State update: {len(messages)} messages")
     
-    total_time = time.time() - start_time
+    total_time = time.monotonic() - start_time
     print()
     print(f"✅ 完成：总状态更新 {event_count} 次，耗时 {total_time:.2f}s")
     print(f"   → stream_mode='values' 通常不会流式传递 LLM chunks")
@@ -214,6 +217,13 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 可选：安装了 uvloop 时使用其事件循环，未安装则保持默认
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(main())
 
 
@@ -24,6 +24,33 @@ from src.llms.llm import get_llm_by_type
 class TestState(State):
     messages: list = []
 
+
+class _StdoutBatcher:
+    """合并高频的流式输出，累计超过字符阈值或时间间隔后再批量写入 stdout"""
+
+    def __init__(self, max_chars=512, interval=0.05):
+        self.max_chars = max_chars
+        self.interval = interval
+        self._pending = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text):
+        self._pending.append(text)
+        self._size += len(text)
+        now = time.monotonic()
+        if self._size > self.max_chars or now - self._last_flush > self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self._pending:
+            sys.stdout.write("".join(self._pending))
+            sys.stdout.flush()
+            self._pending.clear()
+            self._size = 0
+        self._last_flush = now if now is not None else time.monotonic()
+
+
 def test_direct_llm_stream():
     """测试直接使用 llm.stream()"""
     print("=" * 60)
@@ -34,17 +61,20 @@ def test_direct_llm_stream():
     messages = [HumanMessage(content="count to 10 slowly")]
     
     print("开始流式输出...")
-    start_time = time.time()
+    start_time = time.monotonic()
     chunk_count = 0
+    out = _StdoutBatcher()
     
     for chunk in llm.stream(messages):
-        if hasattr(chunk, 'content') and chunk.content:
-            print(chunk.content, end="", flush=True)
+        content = getattr(chunk, "content", None)
+        if content:
+            out.write(content)
             chunk_count += 1
             time.sleep(0.01)  # 模拟观察延迟
     
+    out.flush()
     print()
-    print(f"\n完成: {chunk_count} chunks, 耗时 {time.time() - start_time:.2f}s")
+    print(f"\n完成: {chunk_count} chunks, 耗时 {time.monotonic() - start_time:.2f}s")
     print()
 
 
@@ -60,19 +90,21 @@ def test_node_with_stream_collection():
         messages = [HumanMessage(content="count to 10 slowly")]
         
         print("节点开始执行...")
-        start_time = time.time()
+        start_time = time.monotonic()
         
-        response_content = ""
+        parts = []
         chunk_count = 0
         
         for chunk in llm.stream(messages):
-            if hasattr(chunk, 'content') and chunk.content:
-                response_content += chunk.content  # ❌ 先收集
+            content = getattr(chunk, "content", None)
+            if content:
+                parts.append(content)  # ❌ 先收集
                 chunk_count += 1
         
-        print(f"节点完成: 收集了 {chunk_count} chunks，耗时 {time.time() - start_time:.2f}s")
+        print(f"节点完成: 收集了 {chunk_count} chunks，耗时 {time.monotonic() - start_time:.2f}s")
         print("节点返回完整消息...")
         
+        response_content = "".join(parts)
         return {
             "messages": [AIMessageChunk(content=response_content)]
         }
@@ -86,10 +118,11 @@ def test_node_with_stream_collection():
     app = graph.compile()
     
     print("开始流式执行图...")
-    start_time = time.time()
+    start_time = time.monotonic()
     
     async def run_test():
         chunk_count = 0
+        out = _StdoutBatcher()
         async for chunk in app.astream(
             {"messages": []},
             stream_mode=["messages"]
@@ -97,12 +130,13 @@ def test_node_with_stream_collection():
             # 检查是否是消息 chunk
             for node_name, messages in chunk.items():
                 for msg in messages:
-                    if isinstance(msg, AIMessageChunk) and hasattr(msg, 'content'):
-                        print(msg.content, end="", flush=True)
+                    if isinstance(msg, AIMessageChunk):
+                        out.write(msg.content)
                         chunk_count += 1
         
+        out.flush()
         print()
-        print(f"\n完成: 收到 {chunk_count} 个消息事件，耗时 {time.time() - start_time:.2f}s")
+        print(f"\n完成: 收到 {chunk_count} 个消息事件，耗时 {time.monotonic() - start_time:.2f}s")
     
     asyncio.run(run_test())
     print()
@@ -126,11 +160,13 @@ def test_node_with_chunk_passthrough():
         print()
         
         # 实际实现中，我们需要其他方式来传递 chunk
-        response_content = ""
+        parts = []
         for chunk in llm.stream(messages):
-            if hasattr(chunk, 'content') and chunk.content:
-                response_content += chunk.content
+            content = getattr(chunk, "content", None)
+            if content:
+                parts.append(content)
         
+        response_content = "".join(parts)
         return {
             "messages": [AIMessageChunk(content=response_content)]
         }
@@ -144,22 +180,24 @@ def test_node_with_chunk_passthrough():
     app = graph.compile()
     
     print("开始流式执行图...")
-    start_time = time.time()
+    start_time = time.monotonic()
     
     async def run_test():
         chunk_count = 0
+        out = _StdoutBatcher()
         async for chunk in app.astream(
             {"messages": []},
             stream_mode=["messages"]
         ):
             for node_name, messages in chunk.items():
                 for msg in messages:
-                    if isinstance(msg, AIMessageChunk) and hasattr(msg, 'content'):
-                        print(msg.content, end="", flush=True)
+                    if isinstance(msg, AIMessageChunk):
+                        out.write(msg.content)
                         chunk_count += 1
         
+        out.flush()
         print()
-        print(f"\n完成: 收到 {chunk_count} 个消息事件，耗时 {time.time() - start_time:.2f}s")
+        print(f"\n完成: 收到 {chunk_count} 个消息事件，耗时 {time.monotonic() - start_time:.2f}s")
     
     asyncio.run(run_test())
     print()
@@ -5,9 +5,12 @@
 """
 
 import asyncio
-import json
+import io
 import logging
+import sys
+import time
 import httpx
+import orjson
 from datetime import datetime
 
 # 配置日志
@@ -17,8 +20,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# HTTP 客户端配置：连接阶段快速失败，流式读取保留较长超时
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
 
-async def test_api_endpoint():
+# 流式响应每次读取的字节数
+SSE_CHUNK_SIZE = 65536
+
+# SSE 帧分隔符、data 字段前缀、结束标记和 content 字段名
+_EVENT_END = b"\n\n"
+_DATA = b"data: "
+_DONE = b"[DONE]"
+_CONTENT_KEY = b'"content"'
+
+
+class _StdoutBatcher:
+    """合并高频的流式输出，累计超过字符阈值或时间间隔后再批量写入 stdout"""
+
+    def __init__(self, max_chars=512, interval=0.05):
+        self.max_chars = max_chars
+        self.interval = interval
+        self._pending = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, text):
+        self._pending.append(text)
+        self._size += len(text)
+        now = time.monotonic()
+        if self._size > self.max_chars or now - self._last_flush > self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self._pending:
+            sys.stdout.write("".join(self._pending))
+            sys.stdout.flush()
+            self._pending.clear()
+            self._size = 0
+        self._last_flush = now if now is not None else time.monotonic()
+
+
+async def test_api_endpoint(client):
     """测试后端 API 端点"""
     print("\n" + "=" * 80)
     print("测试 DeerFlow Simple Researcher API")
@@ -30,7 +72,8 @@ async def test_api_endpoint():
     # 测试问题
     question = "今天店里的藕汤有点腥，这是什么原因怎么解决？"
     
-    # 构造测试请求
+    # 构造测试请求（开始时间只取一次，thread_id 复用）
+    start_time = datetime.now()
     request_data = {
         "messages": [
             {
@@ -38,7 +81,7 @@ async def test_api_endpoint():
                 "content": question
             }
         ],
-        "thread_id": f"test_lotus_soup_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        "thread_id": f"test_lotus_soup_{start_time.strftime('%Y%m%d_%H%M%S')}",
         "enable_simple_research": True,
         "locale": "zh-CN",
     }
@@ -49,71 +92,98 @@ async def test_api_endpoint():
     print("-" * 80)
     
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            print("\n发送请求...")
-            print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("\n发送请求...")
+        print(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        async with client.stream("POST", api_url, json=request_data) as response:
+            print(f"响应状态码: {response.status_code}")
             
-            async with client.stream("POST", api_url, json=request_data) as response:
-                print(f"响应状态码: {response.status_code}")
+            if response.status_code == 200:
+                print("\n✅ API 请求成功")
+                print("\n流式响应内容:")
+                print("-" * 80)
                 
-                if response.status_code == 200:
-                    print("\n✅ API 请求成功")
-                    print("\n流式响应内容:")
-                    print("-" * 80)
-                    
-                    full_response = []
-                    event_count = 0
-                    
-                    async for line in response.aiter_lines():
-                        if not line.strip():
+                # 增量写入响应文本，字数和片段数单独计数
+                response_buf = io.StringIO()
+                char_count = 0
+                chunk_count = 0
+                event_count = 0
+                
+                # 按 SSE 事件边界（空行）切分字节流，只对 data 字段做 JSON 解析
+                buf = bytearray()
+                done = False
+                out = _StdoutBatcher()
+                # JSON 解析错误只计数并记录第一条，流结束后汇总输出一次
+                err_count = 0
+                first_err = None
+                async for chunk in response.aiter_bytes(chunk_size=SSE_CHUNK_SIZE):
+                    buf.extend(chunk)
+                    while (end := buf.find(_EVENT_END)) != -1:
+                        # 解析 SSE 的 data 字段：通过 memoryview 切片直接解析，不复制字节
+                        start = buf.find(_DATA, 0, end)
+                        event_data = None
+                        if start != -1:
+                            with memoryview(buf)[start + len(_DATA):end] as data:
+                                if data == _DONE:
+                                    done = True
+                                elif buf.find(_CONTENT_KEY, start + len(_DATA), end) == -1:
+                                    # 不含 content 字段的事件只计数，跳过 JSON 解析
+                                    if len(data):
+                                        event_count += 1
+                                else:
+                                    try:
+                                        event_data = orjson.loads(data)
+                                    except orjson.JSONDecodeError as e:
+                                        err_count += 1
+                                        if first_err is None:
+                                            first_err = (str(e), bytes(data[:200]).decode(errors='replace'))
+                        del buf[:end + len(_EVENT_END)]
+                        
+                        if done:
+                            out.flush()
+                            print("\n✅ 流式响应完成")
+                            break
+                        if event_data is None:
                             continue
                         
-                        # 解析 SSE 格式
-                        if line.startswith("data: "):
-                            data = line[6:]  # 移除 "data: " 前缀
-                            
-                            if data == "[DONE]":
-                                print("\n✅ 流式响应完成")
-                                break
-                            
-                            try:
-                                event_data = json.loads(data)
-                                event_count += 1
-                                
-                                # 检查是否有 content 字段（流式文本输出）
-                                if "content" in event_data:
-                                    content = event_data["content"]
-                                    if content:
-                                        # 实时打印内容（不换行）
-                                        print(content, end='', flush=True)
-                                        full_response.append(content)
-                                
-                            except json.JSONDecodeError as e:
-                                print(f"\n⚠️  解析 JSON 失败: {e}")
-                                print(f"   原始数据: {data[:200]}...")
-                    
-                    print("\n\n" + "=" * 80)
-                    print("最终响应汇总")
-                    print("=" * 80)
-                    print(f"事件总数: {event_count}")
-                    print(f"结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    if full_response:
-                        print("\n完整响应内容:")
-                        print("-" * 80)
-                        final_text = ''.join(full_response)
-                        print(final_text)
-                        print(f"\n总字数: {len(final_text)}")
-                    else:
-                        print("\n⚠️  未收集到完整响应内容")
-                    
-                    print(f"\n📊 统计: 共收到 {event_count} 个事件，收集到 {len(full_response)} 个文本片段")
-                    
+                        event_count += 1
+                        # 检查是否有 content 字段（流式文本输出）
+                        if "content" in event_data:
+                            content = event_data["content"]
+                            if content:
+                                # 实时打印内容（不换行），按批写入
+                                out.write(content)
+                                response_buf.write(content)
+                                char_count += len(content)
+                                chunk_count += 1
+                    if done:
+                        break
+                out.flush()
+                if err_count:
+                    print(f"\n⚠️  解析 JSON 失败 {err_count} 次，首个错误: {first_err[0]}")
+                    print(f"   原始数据: {first_err[1]}...")
+                
+                print("\n\n" + "=" * 80)
+                print("最终响应汇总")
+                print("=" * 80)
+                print(f"事件总数: {event_count}")
+                print(f"结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                if char_count:
+                    print("\n完整响应内容:")
+                    print("-" * 80)
+                    print(response_buf.getvalue())
+                    print(f"\n总字数: {char_count}")
                 else:
-                    print(f"\n❌ API 请求失败")
-                    error_content = await response.aread()
-                    print(f"响应内容: {error_content.decode('utf-8')}")
-                    
+                    print("\n⚠️  未收集到完整响应内容")
+                
+                print(f"\n📊 统计: 共收到 {event_count} 个事件，收集到 {chunk_count} 个文本片段")
+                
+            else:
+                print(f"\n❌ API 请求失败")
+                error_content = await response.aread()
+                print(f"响应内容: {error_content.decode('utf-8')}")
+                
     except httpx.ConnectError:
         print("\n❌ 无法连接到后端服务")
         print("请确保后端服务正在运行:")
@@ -139,12 +209,21 @@ async def main():
     print("测试问题：藕汤腥味问题")
     print("=" * 80)
     
-    await test_api_endpoint()
+    # 客户端在主函数中创建一次，保持连接复用
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS) as client:
+        await test_api_endpoint(client)
     
     print("\n测试完成！")
 
 
 if __name__ == "__main__":
+    # 可选：安装了 uvloop 时使用其事件循环，未安装则保持默认
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
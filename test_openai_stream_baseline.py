@@ -6,6 +6,7 @@
 如果这里也无法流式输出，问题在模型或 SDK；如果这里可以流式输出，问题在 LangGraph/服务端。
 """
 
+import argparse
 import os
 import sys
 import time
@@ -18,8 +19,13 @@ sys.path.insert(0, str(project_root))
 from openai import OpenAI
 from src.config import load_yaml_config
 
-def test_openai_direct_stream():
-    """直接使用 OpenAI SDK 测试流式输出"""
+def test_openai_direct_stream(visual_delay: bool = False):
+    """
+    直接使用 OpenAI SDK 测试流式输出
+    
+    Args:
+        visual_delay: 为True时每个 token 之后暂停 10ms 以便肉眼观察（会拉长流式耗时，默认关闭）
+    """
     print("=" * 60)
     print("基线测试：直接调用 OpenAI API (跳过 LangGraph/服务端)")
     print("=" * 60)
@@ -68,44 +74,51 @@ def test_openai_direct_stream():
         print()
         
         token_count = 0
-        start_time = time.time()
-        first_token_time = None
+        now = time.perf_counter
+        start_time = now()
+        ttft = None
         
         for chunk in stream:
-            # delta 是 ChoiceDelta 对象，不是字典，需要直接访问属性
-            delta = chunk.choices[0].delta if chunk.choices else None
-            content = delta.content if delta and hasattr(delta, 'content') else ""
+            # delta 是 ChoiceDelta 对象，content 属性始终存在（可能为 None）
+            choices = chunk.choices
+            if not choices:
+                continue
+            content = getattr(choices[0].delta, "content", None)
             if content:
-                if first_token_time is None:
-                    first_token_time = time.time()
-                    first_token_delay = first_token_time - start_time
-                    print(f"[TTFB: {first_token_delay:.2f}s] ", end="", flush=True)
+                if ttft is None:
+                    ttft = now() - start_time
+                    print(f"[TTFT: {ttft:.3f}s] ", end="", flush=True)
                 
                 print(content, end="", flush=True)
                 token_count += 1
                 
-                # 每个 token 之间添加小延迟以便观察
-                time.sleep(0.01)
+                # 仅在 --visual-delay 时添加小延迟以便观察，默认测量原始 API 延迟
+                if visual_delay:
+                    time.sleep(0.01)
         
+        ttlt = now() - start_time
         print()
         print()
         print("-" * 60)
         
-        if first_token_time:
-            total_time = time.time() - start_time
-            streaming_duration = time.time() - first_token_time
+        if ttft is not None:
+            streaming_duration = ttlt - ttft
             print(f"✅ 测试完成")
             print(f"   总 token 数: {token_count}")
-            print(f"   首 token 延迟 (TTFB): {first_token_delay:.2f}s")
-            print(f"   总耗时: {total_time:.2f}s")
-            print(f"   流式传输耗时: {streaming_duration:.2f}s")
+            print(f"   首 token 延迟 (TTFT): {ttft:.3f}s")
+            print(f"   总耗时 (TTLT): {ttlt:.3f}s")
+            print(f"   流式传输耗时: {streaming_duration:.3f}s")
+            if streaming_duration > 0:
+                print(f"   吞吐量: {token_count / streaming_duration:.1f} token/s")
+            if visual_delay:
+                print("   ⚠️  已启用 --visual-delay，流式耗时包含每个 token 10ms 的人为延迟")
             print()
             
             # 判断是否真的在流式输出
-            if token_count > 1 and first_token_delay < total_time * 0.5:
+            if token_count > 1 and ttft < ttlt * 0.5:
                 print("✅ 结论：模型端确实在逐 token 推送（流式输出正常）")
                 print("   → 如果 LangGraph 中不是流式的，问题在 LangGraph/服务端")
-            elif first_token_delay > total_time * 0.8:
+            elif ttft > ttlt * 0.8:
                 print("⚠️  结论：模型端可能是一次性返回（大部分内容在最后）")
                 print("   → 问题可能在模型或 SDK 配置")
             else:
@@ -120,5 +133,12 @@ def test_openai_direct_stream():
 
 
 if __name__ == "__main__":
-    test_openai_direct_stream()
+    parser = argparse.ArgumentParser(description="直接测试 OpenAI API 的流式输出")
+    parser.add_argument(
+        "--visual-delay",
+        action="store_true",
+        help="每个 token 之后暂停 10ms 以便观察（会影响耗时统计）",
+    )
+    args = parser.parse_args()
+    test_openai_direct_stream(visual_delay=args.visual_delay)
 
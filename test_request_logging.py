@@ -115,12 +115,13 @@ def test_request_logger():
     
     # 读取日志
     print("\n6️⃣  测试读取日志...")
-    logs = logger.read_logs(limit=10)
+    # tail=True 从文件末尾反向读取，只解析最后几行
+    logs = logger.read_logs(limit=5, tail=True)
     print(f"✅ 成功读取 {len(logs)} 条日志")
     
     # 显示最近的几条日志
     print("\n📋 最近的日志条目:")
-    for i, log in enumerate(logs[-5:], 1):
+    for i, log in enumerate(logs, 1):
         print(f"  {i}. 类型: {log.get('type')}, 请求ID: {log.get('request_id', '')[:50]}...")
     
     # 显示日志文件列表
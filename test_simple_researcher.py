@@ -6,7 +6,9 @@
 
 import asyncio
 import logging
+import statistics
 import sys
+import time
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -25,6 +27,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 并发执行测试用例时同时进行的最大 LLM 调用数
+MAX_CONCURRENCY = 4
+
 
 async def test_simple_researcher_node():
     """测试 simple_researcher_node 函数"""
@@ -58,13 +63,34 @@ async def test_simple_researcher_node():
     print("=" * 80)
     print()
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"\n{'=' * 80}")
-        print(f"测试用例 {i}/{len(test_cases)}: {test_case['name']}")
-        print(f"{'=' * 80}")
-        print(f"查询: {test_case['query']}")
-        print(f"语言: {test_case['locale']}")
-        print("-" * 80)
+    # 预热：首次调用包含模型加载和建立连接的开销，不计入用例耗时
+    print("🔥 预热 simple_researcher_node...")
+    warmup_state: State = {"research_topic": "warmup", "locale": "zh-CN", "messages": []}
+    warmup_config = RunnableConfig(
+        configurable={"thread_id": "test_warmup", "max_search_results": 5}
+    )
+    warmup_start = time.perf_counter()
+    try:
+        await simple_researcher_node(warmup_state, warmup_config)
+        print(f"✅ 预热完成，耗时 {time.perf_counter() - warmup_start:.2f}s")
+    except Exception as e:
+        print(f"⚠️  预热失败（继续执行测试用例）: {type(e).__name__}: {e}")
+    print()
+    
+    async def _run_case(i, test_case):
+        """执行单个测试用例，输出写入独立缓冲区，返回 (输出行, 成功时的耗时秒数)"""
+        out = []
+
+        def emit(*args):
+            out.append(" ".join(str(a) for a in args))
+
+        emit(f"\n{'=' * 80}")
+        emit(f"测试用例 {i}/{len(test_cases)}: {test_case['name']}")
+        emit(f"{'=' * 80}")
+        emit(f"查询: {test_case['query']}")
+        emit(f"语言: {test_case['locale']}")
+        emit("-" * 80)
+        latency = None
         
         # 构造 State
         state: State = {
@@ -82,34 +108,56 @@ async def test_simple_researcher_node():
         )
         
         try:
-            # 调用 simple_researcher_node
-            logger.info(f"开始执行测试用例 {i}...")
-            result = await simple_researcher_node(state, config)
+            # 调用 simple_researcher_node，信号量限制同时进行的 LLM 调用数
+            logger.info("开始执行测试用例 %d...", i)
+            async with sem:
+                start = time.perf_counter()
+                result = await simple_researcher_node(state, config)
+                latency = time.perf_counter() - start
             
             # 打印结果
-            print("\n✅ 测试执行成功")
-            print(f"\n返回结果类型: {type(result)}")
-            print(f"返回结果: {result}")
+            emit(f"\n✅ 测试执行成功，耗时 {latency:.2f}s")
+            emit(f"\n返回结果类型: {type(result)}")
+            emit(f"返回结果: {result}")
             
             # 如果返回的是 Command 对象，提取更新的状态
             if hasattr(result, 'update'):
                 updates = result.update
-                print(f"\n状态更新:")
+                emit(f"\n状态更新:")
                 for key, value in updates.items():
                     if key == "messages":
-                        print(f"  - {key}: {len(value)} 条消息")
+                        emit(f"  - {key}: {len(value)} 条消息")
                         for msg in value:
-                            print(f"    * {msg.name if hasattr(msg, 'name') else 'unknown'}: {msg.content[:200]}...")
+                            emit(f"    * {msg.name if hasattr(msg, 'name') else 'unknown'}: {msg.content[:200]}...")
                     else:
-                        print(f"  - {key}: {value}")
+                        emit(f"  - {key}: {value}")
             
         except Exception as e:
-            print(f"\n❌ 测试执行失败")
-            print(f"错误类型: {type(e).__name__}")
-            print(f"错误信息: {str(e)}")
-            logger.error(f"测试用例 {i} 失败", exc_info=True)
+            emit(f"\n❌ 测试执行失败")
+            emit(f"错误类型: {type(e).__name__}")
+            emit(f"错误信息: {str(e)}")
+            logger.error("测试用例 %d 失败", i, exc_info=True)
         
-        print()
+        emit()
+        return out, latency
+    
+    # 各用例相互独立，并发执行，总耗时约为最慢用例的耗时
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    results = await asyncio.gather(
+        *[_run_case(i, tc) for i, tc in enumerate(test_cases, 1)]
+    )
+    
+    # 按用例顺序输出，避免并发打印交错
+    for out, _ in results:
+        print("\n".join(out))
+    
+    latencies = [latency for _, latency in results if latency is not None]
+    if latencies:
+        print(f"⏱️  成功用例 {len(latencies)}/{len(test_cases)}，平均耗时 {statistics.mean(latencies):.2f}s")
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=20, method="inclusive")
+        print(f"   p50: {cuts[9]:.2f}s | p95: {cuts[18]:.2f}s")
+    print()
     
     print("=" * 80)
     print("所有测试用例执行完毕")
@@ -174,9 +222,34 @@ async def test_simple_graph():
         logger.error("图流程执行失败", exc_info=True)
 
 
+# 端到端测试共享的 httpx.AsyncClient，首次使用时创建，在 main 结束时关闭
+_http_client = None
+
+
+def _get_http_client():
+    """返回共享的 httpx.AsyncClient，首次调用时创建（连接池跨请求复用）"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _http_client
+
+
+async def _close_http_client():
+    """关闭共享的 httpx.AsyncClient"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 async def test_api_endpoint():
     """测试后端 API 端点"""
     import httpx
+    import orjson
     
     print("\n" + "=" * 80)
     print("测试后端 API 端点")
@@ -203,35 +276,48 @@ async def test_api_endpoint():
     print("-" * 80)
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            print("\n发送请求...")
+        # 复用模块级共享客户端，多次调用时不再重复建立连接
+        client = _get_http_client()
+        print("\n发送请求...")
+        
+        async with client.stream("POST", api_url, json=request_data) as response:
+            print(f"响应状态码: {response.status_code}")
             
-            async with client.stream("POST", api_url, json=request_data) as response:
-                print(f"响应状态码: {response.status_code}")
+            if response.status_code == 200:
+                print("\n✅ API 请求成功")
+                print("\n流式响应内容:")
+                print("-" * 80)
+                
+                # 直接在字节流上按行切分 SSE，不做逐行解码
+                start_time = time.perf_counter()
+                ttft = None
+                buf = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buf += chunk
+                    while (nl := buf.find(b"\n")) != -1:
+                        line = bytes(buf[:nl])
+                        del buf[:nl + 1]
+                        # 解析 SSE 格式
+                        if not line.startswith(b"data: "):
+                            continue
+                        data = line[6:]  # 移除 "data: " 前缀
+                        if data == b"[DONE]":
+                            continue
+                        try:
+                            event_data = orjson.loads(data)
+                        except orjson.JSONDecodeError:
+                            print(f"   原始数据: {data[:200].decode(errors='replace')}...")
+                            continue
+                        if ttft is None and event_data.get("content"):
+                            ttft = time.perf_counter() - start_time
+                            print(f"⏱️  首个内容事件 (TTFT): {ttft:.3f}s")
+                        print(f"📦 事件: {event_data.get('event', 'unknown')}")
+                        if 'data' in event_data:
+                            print(f"   数据: {str(event_data['data'])[:200]}...")
+            else:
+                print(f"\n❌ API 请求失败")
+                print(f"响应内容: {await response.aread()}")
                 
-                if response.status_code == 200:
-                    print("\n✅ API 请求成功")
-                    print("\n流式响应内容:")
-                    print("-" * 80)
-                    
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            # 解析 SSE 格式
-                            if line.startswith("data: "):
-                                data = line[6:]  # 移除 "data: " 前缀
-                                if data != "[DONE]":
-                                    try:
-                                        import json
-                                        event_data = json.loads(data)
-                                        print(f"📦 事件: {event_data.get('event', 'unknown')}")
-                                        if 'data' in event_data:
-                                            print(f"   数据: {str(event_data['data'])[:200]}...")
-                                    except json.JSONDecodeError:
-                                        print(f"   原始数据: {data[:200]}...")
-                else:
-                    print(f"\n❌ API 请求失败")
-                    print(f"响应内容: {await response.aread()}")
-                    
     except httpx.ConnectError:
         print("\n❌ 无法连接到后端服务")
         print("请确保后端服务正在运行: docker ps | grep deer-flow-backend")
@@ -257,19 +343,22 @@ async def main():
     
     choice = input("\n请输入选项 (1-4, 默认为 1): ").strip() or "1"
     
-    if choice == "1":
-        await test_simple_researcher_node()
-    elif choice == "2":
-        await test_simple_graph()
-    elif choice == "3":
-        await test_api_endpoint()
-    elif choice == "4":
-        await test_simple_researcher_node()
-        await test_simple_graph()
-        await test_api_endpoint()
-    else:
-        print(f"无效的选项: {choice}")
-        return
+    try:
+        if choice == "1":
+            await test_simple_researcher_node()
+        elif choice == "2":
+            await test_simple_graph()
+        elif choice == "3":
+            await test_api_endpoint()
+        elif choice == "4":
+            await test_simple_researcher_node()
+            await test_simple_graph()
+            await test_api_endpoint()
+        else:
+            print(f"无效的选项: {choice}")
+            return
+    finally:
+        await _close_http_client()
     
     print("\n测试完成！")
 
@@ -1,18 +1,26 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
 import os
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from langchain_core.messages import AIMessageChunk, ToolMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 from langgraph.types import Command
+from sse_starlette.sse import AppStatus
 
 from src.config.report_style import ReportStyle
-from src.server.app import _astream_workflow_generator, _make_event, app
+from src.server.app import (
+    _astream_workflow_generator,
+    _coalesce_frames,
+    _get_server_settings,
+    _make_event,
+    app,
+)
 
 
 @pytest.fixture
@@ -20,13 +28,30 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def reset_sse_app_status():
+    # sse-starlette caches its exit event on the first event loop it sees;
+    # each TestClient runs on a fresh loop.
+    AppStatus.should_exit_event = None
+    yield
+    AppStatus.should_exit_event = None
+
+
+@pytest.fixture(autouse=True)
+def reset_server_settings():
+    # Server settings are cached per process; tests patch the environment.
+    _get_server_settings.cache_clear()
+    yield
+    _get_server_settings.cache_clear()
+
+
 class TestMakeEvent:
     def test_make_event_with_content(self):
         event_type = "message_chunk"
         data = {"content": "Hello", "role": "assistant"}
         result = _make_event(event_type, data)
         expected = (
-            'event: message_chunk\ndata: {"content": "Hello", "role": "assistant"}\n\n'
+            'event: message_chunk\ndata: {"content":"Hello","role":"assistant"}\n\n'
         )
         assert result == expected
 
@@ -34,7 +59,7 @@ class TestMakeEvent:
         event_type = "message_chunk"
         data = {"content": "", "role": "assistant"}
         result = _make_event(event_type, data)
-        expected = 'event: message_chunk\ndata: {"role": "assistant"}\n\n'
+        expected = 'event: message_chunk\ndata: {"role":"assistant"}\n\n'
         assert result == expected
 
     def test_make_event_without_content(self):
@@ -42,10 +67,66 @@ class TestMakeEvent:
         data = {"role": "assistant", "tool_calls": []}
         result = _make_event(event_type, data)
         expected = (
-            'event: tool_calls\ndata: {"role": "assistant", "tool_calls": []}\n\n'
+            'event: tool_calls\ndata: {"role":"assistant","tool_calls":[]}\n\n'
         )
         assert result == expected
 
+    def test_make_event_keeps_non_ascii(self):
+        result = _make_event("message_chunk", {"content": "藕汤"})
+        assert result == 'event: message_chunk\ndata: {"content":"藕汤"}\n\n'
+
+    def test_make_event_falls_back_for_unsupported_payload(self):
+        result = _make_event("message_chunk", {"langgraph_step": 2**70})
+        assert result == (
+            f'event: message_chunk\ndata: {{"langgraph_step":{2**70}}}\n\n'
+        )
+
+
+async def _frames(items, delay=0.0, error=None):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+    if error:
+        raise error
+
+
+class TestCoalesceFrames:
+    @pytest.mark.asyncio
+    async def test_merges_frames_within_window(self):
+        frames = ["event: message_chunk\ndata: {}\n\n"] * 3
+        result = [chunk async for chunk in _coalesce_frames(_frames(frames), 0.05)]
+        assert result == ["".join(frames)]
+
+    @pytest.mark.asyncio
+    async def test_flushes_tool_calls_immediately(self):
+        token = "event: message_chunk\ndata: {}\n\n"
+        tool_calls = "event: tool_calls\ndata: {}\n\n"
+        result = [
+            chunk
+            async for chunk in _coalesce_frames(
+                _frames([token, tool_calls, token]), 0.05
+            )
+        ]
+        assert result == [token + tool_calls, token]
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_window_elapses(self):
+        frames = ["a\n\n", "b\n\n"]
+        result = [
+            chunk
+            async for chunk in _coalesce_frames(_frames(frames, delay=0.05), 0.01)
+        ]
+        assert result == frames
+
+    @pytest.mark.asyncio
+    async def test_propagates_source_errors(self):
+        with pytest.raises(ValueError):
+            async for _ in _coalesce_frames(
+                _frames(["a\n\n"], error=ValueError("boom")), 0.01
+            ):
+                pass
+
 
 class TestTTSEndpoint:
     @patch.dict(
@@ -150,11 +231,9 @@ class TestTTSEndpoint:
 
 
 class TestPodcastEndpoint:
-    @patch("src.server.app.build_podcast_graph")
-    def test_generate_podcast_success(self, mock_build_graph, client):
-        mock_workflow = MagicMock()
-        mock_build_graph.return_value = mock_workflow
-        mock_workflow.invoke.return_value = {"output": b"fake_audio_data"}
+    @patch("src.server.app.podcast_graph")
+    def test_generate_podcast_success(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(return_value={"output": b"fake_audio_data"})
 
         request_data = {"content": "Test content for podcast"}
 
@@ -164,9 +243,11 @@ class TestPodcastEndpoint:
         assert response.headers["content-type"] == "audio/mp3"
         assert response.content == b"fake_audio_data"
 
-    @patch("src.server.app.build_podcast_graph")
-    def test_generate_podcast_error(self, mock_build_graph, client):
-        mock_build_graph.side_effect = Exception("Podcast generation failed")
+    @patch("src.server.app.podcast_graph")
+    def test_generate_podcast_error(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(
+            side_effect=Exception("Podcast generation failed")
+        )
 
         request_data = {"content": "Test content"}
 
@@ -177,14 +258,13 @@ class TestPodcastEndpoint:
 
 
 class TestPPTEndpoint:
-    @patch("src.server.app.build_ppt_graph")
-    @patch("builtins.open", new_callable=mock_open, read_data=b"fake_ppt_data")
-    def test_generate_ppt_success(self, mock_file, mock_build_graph, client):
-        mock_workflow = MagicMock()
-        mock_build_graph.return_value = mock_workflow
-        mock_workflow.invoke.return_value = {
-            "generated_file_path": "/fake/path/test.pptx"
-        }
+    @patch("src.server.app.ppt_graph")
+    def test_generate_ppt_success(self, mock_workflow, client, tmp_path):
+        ppt_file = tmp_path / "test.pptx"
+        ppt_file.write_bytes(b"fake_ppt_data")
+        mock_workflow.ainvoke = AsyncMock(
+            return_value={"generated_file_path": str(ppt_file)}
+        )
 
         request_data = {"content": "Test content for PPT"}
 
@@ -197,9 +277,22 @@ class TestPPTEndpoint:
         )
         assert response.content == b"fake_ppt_data"
 
-    @patch("src.server.app.build_ppt_graph")
-    def test_generate_ppt_error(self, mock_build_graph, client):
-        mock_build_graph.side_effect = Exception("PPT generation failed")
+    @patch("src.server.app.ppt_graph")
+    def test_generate_ppt_missing_file(self, mock_workflow, client, tmp_path):
+        mock_workflow.ainvoke = AsyncMock(
+            return_value={"generated_file_path": str(tmp_path / "missing.pptx")}
+        )
+
+        response = client.post("/api/ppt/generate", json={"content": "Test"})
+
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Internal Server Error"
+
+    @patch("src.server.app.ppt_graph")
+    def test_generate_ppt_error(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(
+            side_effect=Exception("PPT generation failed")
+        )
 
         request_data = {"content": "Test content"}
 
@@ -210,11 +303,9 @@ class TestPPTEndpoint:
 
 
 class TestEnhancePromptEndpoint:
-    @patch("src.server.app.build_prompt_enhancer_graph")
-    def test_enhance_prompt_success(self, mock_build_graph, client):
-        mock_workflow = MagicMock()
-        mock_build_graph.return_value = mock_workflow
-        mock_workflow.invoke.return_value = {"output": "Enhanced prompt"}
+    @patch("src.server.app.prompt_enhancer_graph")
+    def test_enhance_prompt_success(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(return_value={"output": "Enhanced prompt"})
 
         request_data = {
             "prompt": "Original prompt",
@@ -227,11 +318,9 @@ class TestEnhancePromptEndpoint:
         assert response.status_code == 200
         assert response.json()["result"] == "Enhanced prompt"
 
-    @patch("src.server.app.build_prompt_enhancer_graph")
-    def test_enhance_prompt_with_different_styles(self, mock_build_graph, client):
-        mock_workflow = MagicMock()
-        mock_build_graph.return_value = mock_workflow
-        mock_workflow.invoke.return_value = {"output": "Enhanced prompt"}
+    @patch("src.server.app.prompt_enhancer_graph")
+    def test_enhance_prompt_with_different_styles(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(return_value={"output": "Enhanced prompt"})
 
         styles = [
             "ACADEMIC",
@@ -247,9 +336,9 @@ class TestEnhancePromptEndpoint:
             response = client.post("/api/prompt/enhance", json=request_data)
             assert response.status_code == 200
 
-    @patch("src.server.app.build_prompt_enhancer_graph")
-    def test_enhance_prompt_error(self, mock_build_graph, client):
-        mock_build_graph.side_effect = Exception("Enhancement failed")
+    @patch("src.server.app.prompt_enhancer_graph")
+    def test_enhance_prompt_error(self, mock_workflow, client):
+        mock_workflow.ainvoke = AsyncMock(side_effect=Exception("Enhancement failed"))
 
         request_data = {"prompt": "Test prompt"}
 
@@ -260,7 +349,7 @@ class TestEnhancePromptEndpoint:
 
 
 class TestMCPEndpoint:
-    @patch("src.server.app.load_mcp_tools")
+    @patch("src.server.app.load_mcp_tools_cached")
     @patch.dict(
         os.environ,
         {"ENABLE_MCP_SERVER_CONFIGURATION": "true"},
@@ -285,7 +374,7 @@ class TestMCPEndpoint:
         assert response_data["command"] == "test_command"
         assert len(response_data["tools"]) == 1
 
-    @patch("src.server.app.load_mcp_tools")
+    @patch("src.server.app.load_mcp_tools_cached")
     @patch.dict(
         os.environ,
         {"ENABLE_MCP_SERVER_CONFIGURATION": "true"},
@@ -304,7 +393,7 @@ class TestMCPEndpoint:
         assert response.status_code == 200
         mock_load_tools.assert_called_once()
 
-    @patch("src.server.app.load_mcp_tools")
+    @patch("src.server.app.load_mcp_tools_cached")
     @patch.dict(
         os.environ,
         {"ENABLE_MCP_SERVER_CONFIGURATION": "true"},
@@ -326,7 +415,7 @@ class TestMCPEndpoint:
         assert response.status_code == 500
         assert response.json()["detail"] == "Internal Server Error"
 
-    @patch("src.server.app.load_mcp_tools")
+    @patch("src.server.app.load_mcp_tools_cached")
     @patch.dict(
         os.environ,
         {"ENABLE_MCP_SERVER_CONFIGURATION": ""},
@@ -412,6 +501,7 @@ class TestChatStreamEndpoint:
 
         assert response.status_code == 200
         assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+        assert response.headers["x-accel-buffering"] == "no"
 
     @patch("src.server.app.graph")
     def test_chat_stream_with_mcp_settings(self, mock_graph, client):
@@ -542,7 +632,7 @@ class TestAstreamWorkflowGenerator:
         assert "event: message_chunk" in events[0]
         assert "Hello world" in events[0]
         # Check for the actual agent name that appears in the output
-        assert '"agent": "a"' in events[0]
+        assert '"agent":"a"' in events[0]
 
     @pytest.mark.asyncio
     @patch("src.server.app.graph")
@@ -772,6 +862,227 @@ class TestAstreamWorkflowGenerator:
         assert "finish_reason" in events[0]
         assert "stop" in events[0]
 
+    @pytest.mark.asyncio
+    @patch("src.server.app.get_request_logger")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_logs_final_result(
+        self, mock_graph, mock_get_request_logger
+    ):
+        mock_ai_message = AIMessageChunk(content="Final answer")
+        mock_ai_message.id = "msg_final"
+        mock_ai_message.response_metadata = {"finish_reason": "stop"}
+        mock_ai_message.tool_calls = []
+        mock_ai_message.tool_call_chunks = []
+
+        async def mock_astream(*args, **kwargs):
+            yield ("agent1:subagent", "step1", (mock_ai_message, {}))
+
+        mock_graph.astream = mock_astream
+        mock_request_logger = MagicMock()
+        mock_get_request_logger.return_value = mock_request_logger
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            request_id="req_1",
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 1
+        assert isinstance(events[0], str)
+        mock_request_logger.log_response.assert_called_once()
+        kwargs = mock_request_logger.log_response.call_args.kwargs
+        assert kwargs["request_id"] == "req_1"
+        assert kwargs["final_result"] == "Final answer"
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.get_request_logger")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_bounds_intermediate_results(
+        self, mock_graph, mock_get_request_logger
+    ):
+        async def mock_astream(*args, **kwargs):
+            for index in range(25):
+                message = AIMessageChunk(content=f"chunk {index}")
+                message.id = f"msg_{index}"
+                yield ("agent1", "step1", (message, {}))
+
+        mock_graph.astream = mock_astream
+        mock_request_logger = MagicMock()
+        mock_get_request_logger.return_value = mock_request_logger
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            request_id="req_4",
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 25
+        kwargs = mock_request_logger.log_response.call_args.kwargs
+        assert len(kwargs["intermediate_results"]) == 20
+        assert kwargs["intermediate_results"][0]["content"] == "chunk 5"
+        assert kwargs["response_metadata"]["total_events"] == 25
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.get_request_logger")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_final_message_wins(
+        self, mock_graph, mock_get_request_logger
+    ):
+        report = AIMessage(content="Full final report", id="msg_report")
+        trailing_chunk = AIMessageChunk(content="done")
+        trailing_chunk.id = "msg_trailing"
+        trailing_chunk.response_metadata = {"finish_reason": "stop"}
+
+        async def mock_astream(*args, **kwargs):
+            yield ("reporter", "step1", (report, {}))
+            yield ("agent1", "step2", (trailing_chunk, {}))
+
+        mock_graph.astream = mock_astream
+        mock_request_logger = MagicMock()
+        mock_get_request_logger.return_value = mock_request_logger
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            request_id="req_3",
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 2
+        kwargs = mock_request_logger.log_response.call_args.kwargs
+        assert kwargs["final_result"] == "Full final report"
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.get_request_logger")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_empty_final_message_keeps_result(
+        self, mock_graph, mock_get_request_logger
+    ):
+        report = AIMessage(content="Full final report", id="msg_report")
+        tool_only = AIMessage(
+            content="",
+            id="msg_tool_only",
+            tool_calls=[{"name": "bm25_search", "args": {}, "id": "call_1"}],
+        )
+
+        async def mock_astream(*args, **kwargs):
+            yield ("reporter", "step1", (report, {}))
+            yield ("agent1", "step2", (tool_only, {}))
+
+        mock_graph.astream = mock_astream
+        mock_request_logger = MagicMock()
+        mock_get_request_logger.return_value = mock_request_logger
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            request_id="req_5",
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 2
+        kwargs = mock_request_logger.log_response.call_args.kwargs
+        assert kwargs["final_result"] == "Full final report"
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.get_request_logger")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_drains_log_queue(
+        self, mock_graph, mock_get_request_logger
+    ):
+        long_content = "x" * 150
+        mock_messages = []
+        for index, content in enumerate(["short", long_content]):
+            message = AIMessageChunk(content=content)
+            message.id = f"msg_{index}"
+            message.response_metadata = {}
+            message.tool_calls = []
+            message.tool_call_chunks = []
+            mock_messages.append(message)
+
+        async def mock_astream(*args, **kwargs):
+            for message in mock_messages:
+                yield ("agent1:subagent", "step1", (message, {}))
+
+        mock_graph.astream = mock_astream
+        mock_request_logger = MagicMock()
+        mock_get_request_logger.return_value = mock_request_logger
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            request_id="req_2",
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 2
+        mock_request_logger.log_prompt.assert_called_once()
+        assert mock_request_logger.log_prompt.call_args.kwargs["prompt"] == (
+            long_content
+        )
+        kwargs = mock_request_logger.log_response.call_args.kwargs
+        assert [r["content"] for r in kwargs["intermediate_results"]] == [
+            "short",
+            long_content,
+        ]
+
     @pytest.mark.asyncio
     @patch("src.server.app.graph")
     async def test_astream_workflow_generator_config_passed_correctly(self, mock_graph):
@@ -790,14 +1101,68 @@ class TestAstreamWorkflowGenerator:
             assert config["report_style"] == ReportStyle.NEWS.value
             yield ("agent1", "messages", [mock_ai_message])
 
+    @pytest.mark.asyncio
+    @patch.dict(
+        os.environ,
+        {
+            "LANGGRAPH_CHECKPOINT_SAVER": "true",
+            "LANGGRAPH_CHECKPOINT_DB_URL": "mongodb://localhost:27017",
+        },
+    )
+    @patch("src.server.app.AsyncMongoDBSaver")
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_checkpointer_uses_selected_graph(
+        self, mock_graph, mock_saver_class
+    ):
+        mock_ai_message = AIMessageChunk(content="From selected graph")
+        mock_ai_message.id = "msg_selected"
+        mock_ai_message.response_metadata = {}
+        mock_ai_message.tool_calls = []
+        mock_ai_message.tool_call_chunks = []
+
+        async def mock_astream(*args, **kwargs):
+            yield ("agent1:subagent", "step1", (mock_ai_message, {}))
+
+        async def unexpected_astream(*args, **kwargs):
+            raise AssertionError("default graph should not be streamed")
+            yield
+
+        selected_graph = MagicMock()
+        selected_graph.astream = mock_astream
+        mock_graph.astream = unexpected_astream
+
+        mock_checkpointer = MagicMock()
+        mock_context = MagicMock()
+        mock_context.__aenter__.return_value = mock_checkpointer
+        mock_context.__aexit__.return_value = None
+        mock_saver_class.from_conn_string.return_value = mock_context
+
+        generator = _astream_workflow_generator(
+            messages=[],
+            thread_id="test_thread",
+            resources=[],
+            max_plan_iterations=3,
+            max_step_num=10,
+            max_search_results=5,
+            auto_accepted_plan=True,
+            interrupt_feedback="",
+            mcp_settings={},
+            enable_background_investigation=False,
+            report_style=ReportStyle.ACADEMIC,
+            enable_deep_thinking=False,
+            graph_instance=selected_graph,
+        )
+
+        events = [event async for event in generator]
+
+        assert len(events) == 1
+        assert "From selected graph" in events[0]
+        assert selected_graph.checkpointer is mock_checkpointer
 
-class TestGenerateProseEndpoint:
-    @patch("src.server.app.build_prose_graph")
-    def test_generate_prose_success(self, mock_build_graph, client):
-        # Mock the workflow and its astream method
-        mock_workflow = MagicMock()
-        mock_build_graph.return_value = mock_workflow
 
+class TestGenerateProseEndpoint:
+    @patch("src.server.app.prose_graph")
+    def test_generate_prose_success(self, mock_workflow, client):
         class MockEvent:
             def __init__(self, content):
                 self.content = content
@@ -822,9 +1187,9 @@ class TestGenerateProseEndpoint:
         content = b"".join(response.iter_bytes())
         assert b"Generated prose 1" in content or b"Generated prose 2" in content
 
-    @patch("src.server.app.build_prose_graph")
-    def test_generate_prose_error(self, mock_build_graph, client):
-        mock_build_graph.side_effect = Exception("Prose generation failed")
+    @patch("src.server.app.prose_graph")
+    def test_generate_prose_error(self, mock_workflow, client):
+        mock_workflow.astream.side_effect = Exception("Prose generation failed")
         request_data = {
             "prompt": "Write a story.",
             "option": "default",
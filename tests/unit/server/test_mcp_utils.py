@@ -1,6 +1,7 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -130,3 +131,75 @@ async def test_load_mcp_tools_exception_handling(
         await mcp_utils.load_mcp_tools(server_type="stdio", command="foo")
     assert exc.value.status_code == 500
     assert "unexpected error" in exc.value.detail
+
+
+@pytest.fixture
+def empty_mcp_tools_cache():
+    mcp_utils.clear_mcp_tools_cache()
+    yield
+    mcp_utils.clear_mcp_tools_cache()
+
+
+@pytest.mark.asyncio
+@patch("src.server.mcp_utils.load_mcp_tools", new_callable=AsyncMock)
+async def test_load_mcp_tools_cached_reuses_result(mock_load, empty_mcp_tools_cache):
+    mock_load.return_value = ["toolA"]
+
+    first = await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+    second = await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+    other = await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://b")
+
+    assert first == second == other == ["toolA"]
+    assert mock_load.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("src.server.mcp_utils.load_mcp_tools", new_callable=AsyncMock)
+async def test_load_mcp_tools_cached_expires(mock_load, empty_mcp_tools_cache):
+    mock_load.return_value = ["toolA"]
+
+    with patch("src.server.mcp_utils.time.monotonic", return_value=0.0):
+        await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+    expired = mcp_utils.MCP_TOOLS_CACHE_TTL_SECONDS + 1.0
+    with patch("src.server.mcp_utils.time.monotonic", return_value=expired):
+        await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+
+    assert mock_load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_load_mcp_tools_cached_coalesces_concurrent_calls(
+    empty_mcp_tools_cache,
+):
+    calls = 0
+
+    async def slow_load(**kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["toolA"]
+
+    with patch("src.server.mcp_utils.load_mcp_tools", side_effect=slow_load):
+        results = await asyncio.gather(
+            *(
+                mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+                for _ in range(5)
+            )
+        )
+
+    assert results == [["toolA"]] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+@patch("src.server.mcp_utils.load_mcp_tools", new_callable=AsyncMock)
+async def test_load_mcp_tools_cached_does_not_cache_errors(
+    mock_load, empty_mcp_tools_cache
+):
+    mock_load.side_effect = [HTTPException(status_code=500, detail="boom"), ["toolA"]]
+
+    with pytest.raises(HTTPException):
+        await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+    result = await mcp_utils.load_mcp_tools_cached(server_type="sse", url="http://a")
+
+    assert result == ["toolA"]
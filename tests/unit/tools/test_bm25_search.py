@@ -0,0 +1,367 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import gzip
+import json
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+import requests
+
+from src.tools import bm25_search
+from src.tools.bm25_search import (
+    bm25_health_check_tool,
+    bm25_search_tool,
+    bm25_stats_tool,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    bm25_search._SEARCH_CACHE.clear()
+    bm25_search._GZIP_UNSUPPORTED_SERVERS.clear()
+    bm25_search._HEALTH_CACHE.clear()
+    bm25_search._STATS_CACHE.clear()
+    yield
+    bm25_search._SEARCH_CACHE.clear()
+    bm25_search._GZIP_UNSUPPORTED_SERVERS.clear()
+    bm25_search._HEALTH_CACHE.clear()
+    bm25_search._STATS_CACHE.clear()
+
+
+def _response(payload):
+    response = Mock()
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _payload(query, limit=3, include_snippets=True):
+    return {
+        "query": query,
+        "limit": limit,
+        "include_snippets": include_snippets,
+        "strategy": "wand",
+        "top_k": limit,
+        "k1_block_max": True,
+    }
+
+
+class TestBM25Session:
+    def test_session_is_shared(self):
+        assert bm25_search._get_session() is bm25_search._get_session()
+
+    def test_session_mounts_pooled_adapter(self):
+        adapter = bm25_search._get_session().get_adapter("http://localhost:5003")
+        assert adapter.max_retries.total == bm25_search.RETRY_ATTEMPTS
+        # POST is only retried on connection errors, never on 5xx responses
+        assert "POST" not in adapter.max_retries.allowed_methods
+
+
+class TestBM25SearchTool:
+    @patch("src.tools.bm25_search._get_session")
+    def test_search_formats_results(self, mock_get_session):
+        mock_get_session.return_value.post.return_value = _response(
+            {
+                "results": [
+                    {"title": "藕汤SOP", "score": 1.5, "snippet": "片段", "path": "a.md"}
+                ],
+                "search_time_seconds": 0.01,
+            }
+        )
+
+        result = bm25_search_tool.invoke(
+            {"query": "藕汤", "server_url": "http://bm25:5003"}
+        )
+
+        mock_get_session.return_value.post.assert_called_once_with(
+            "http://bm25:5003/search",
+            json=_payload("藕汤"),
+            timeout=10,
+        )
+        assert "**标题**: 藕汤SOP" in result
+        assert "**评分**: 1.500" in result
+        assert "**内容片段**: 片段" in result
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_search_without_results(self, mock_get_session):
+        mock_get_session.return_value.post.return_value = _response({"results": []})
+
+        result = bm25_search_tool.invoke({"query": "不存在"})
+
+        assert result == "未找到与 '不存在' 相关的结果"
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_search_connection_error(self, mock_get_session):
+        mock_get_session.return_value.post.side_effect = (
+            requests.exceptions.ConnectionError("refused")
+        )
+
+        result = bm25_search_tool.invoke({"query": "藕汤"})
+
+        assert result.startswith("BM25搜索服务连接失败")
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_search_reuses_cached_result(self, mock_get_session):
+        mock_get_session.return_value.post.return_value = _response(
+            {"results": [{"title": "藕汤SOP", "score": 1.0, "path": "a.md"}]}
+        )
+
+        first = bm25_search_tool.invoke({"query": "藕汤"})
+        second = bm25_search_tool.invoke({"query": "藕汤"})
+        bm25_search_tool.invoke({"query": "藕汤", "limit": 5})
+
+        assert first == second
+        assert mock_get_session.return_value.post.call_count == 2
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_search_does_not_cache_errors(self, mock_get_session):
+        mock_get_session.return_value.post.side_effect = [
+            requests.exceptions.ConnectionError("refused"),
+            _response({"results": [{"title": "藕汤SOP", "score": 1.0}]}),
+        ]
+
+        bm25_search_tool.invoke({"query": "藕汤"})
+        result = bm25_search_tool.invoke({"query": "藕汤"})
+
+        assert "藕汤SOP" in result
+
+
+class TestBM25SearchToolAsync:
+    @pytest.mark.asyncio
+    @patch("src.tools.bm25_search._get_async_client")
+    async def test_ainvoke_uses_async_client(self, mock_get_client):
+        mock_get_client.return_value.post = AsyncMock(
+            return_value=_response(
+                {"results": [{"title": "藕汤SOP", "score": 1.0, "path": "a.md"}]}
+            )
+        )
+
+        result = await bm25_search_tool.ainvoke(
+            {"query": "藕汤", "server_url": "http://bm25:5003"}
+        )
+
+        mock_get_client.assert_called_once_with("http://bm25:5003")
+        mock_get_client.return_value.post.assert_awaited_once_with(
+            "/search", json=_payload("藕汤")
+        )
+        assert "**标题**: 藕汤SOP" in result
+
+    @pytest.mark.asyncio
+    @patch("src.tools.bm25_search._get_async_client")
+    async def test_ainvoke_connection_error(self, mock_get_client):
+        mock_get_client.return_value.post = AsyncMock(
+            side_effect=httpx.ConnectError("refused")
+        )
+
+        with patch("src.tools.bm25_search.asyncio.sleep", new_callable=AsyncMock):
+            result = await bm25_search_tool.ainvoke({"query": "藕汤"})
+
+        assert result.startswith("BM25搜索服务连接失败")
+        assert (
+            mock_get_client.return_value.post.await_count
+            == bm25_search.RETRY_ATTEMPTS
+        )
+
+    @pytest.mark.asyncio
+    @patch("src.tools.bm25_search.asyncio.sleep", new_callable=AsyncMock)
+    @patch("src.tools.bm25_search._get_async_client")
+    async def test_ainvoke_retries_connect_errors(self, mock_get_client, mock_sleep):
+        mock_get_client.return_value.post = AsyncMock(
+            side_effect=[
+                httpx.ConnectError("refused"),
+                _response({"results": [{"title": "藕汤SOP", "score": 1.0}]}),
+            ]
+        )
+
+        result = await bm25_search_tool.ainvoke({"query": "藕汤"})
+
+        assert "藕汤SOP" in result
+        assert mock_get_client.return_value.post.await_count == 2
+        mock_sleep.assert_awaited_once()
+        assert 0 <= mock_sleep.await_args.args[0] <= bm25_search.RETRY_INITIAL_DELAY
+
+    @pytest.mark.asyncio
+    async def test_async_client_is_shared_per_server(self):
+        client = bm25_search._get_async_client("http://bm25:5003")
+        try:
+            assert bm25_search._get_async_client("http://bm25:5003") is client
+            assert bm25_search._get_async_client("http://other:5003") is not client
+        finally:
+            await bm25_search.close_async_clients()
+
+    def test_async_client_is_not_shared_across_event_loops(self):
+        async def get_client():
+            return bm25_search._get_async_client("http://bm25:5003")
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        assert first is not second
+
+    @pytest.mark.asyncio
+    async def test_close_async_clients(self):
+        client = bm25_search._get_async_client("http://bm25:5003")
+
+        await bm25_search.close_async_clients()
+
+        assert client.is_closed
+        assert bm25_search._get_async_client("http://bm25:5003") is not client
+        await bm25_search.close_async_clients()
+
+
+class TestBuildSearchPayload:
+    @patch.dict("os.environ", {}, clear=True)
+    def test_includes_pruning_hints_by_default(self):
+        assert bm25_search._build_search_payload("藕汤", 5, False) == _payload(
+            "藕汤", limit=5, include_snippets=False
+        )
+
+    @patch.dict("os.environ", {"BM25_STRATEGY": ""})
+    def test_hints_can_be_disabled(self):
+        assert bm25_search._build_search_payload("藕汤", 3, True) == {
+            "query": "藕汤",
+            "limit": 3,
+            "include_snippets": True,
+        }
+
+
+class TestCompressedSearchBody:
+    @patch("src.tools.bm25_search._get_session")
+    def test_large_query_is_sent_gzipped(self, mock_get_session):
+        query = "藕汤" * 400
+        mock_get_session.return_value.post.return_value = _response({"results": []})
+
+        bm25_search_tool.invoke({"query": query, "server_url": "http://bm25:5003"})
+
+        kwargs = mock_get_session.return_value.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(kwargs["data"]))["query"] == query
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_falls_back_when_server_rejects_gzip(self, mock_get_session):
+        rejected = _response({})
+        rejected.status_code = 415
+        mock_get_session.return_value.post.side_effect = [
+            rejected,
+            _response({"results": []}),
+        ]
+
+        bm25_search_tool.invoke(
+            {"query": "藕汤" * 400, "server_url": "http://bm25:5003"}
+        )
+
+        last_call = mock_get_session.return_value.post.call_args
+        assert "json" in last_call.kwargs
+        assert "http://bm25:5003" in bm25_search._GZIP_UNSUPPORTED_SERVERS
+        assert (
+            bm25_search._compress_search_body("http://bm25:5003", {"q": "x" * 2048})
+            is None
+        )
+
+    def test_small_body_is_not_compressed(self):
+        assert bm25_search._compress_search_body("http://bm25:5003", {"q": "x"}) is None
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        cache = bm25_search._TTLCache(maxsize=2, ttl=10)
+        with patch("src.tools.bm25_search.time.monotonic", return_value=0.0):
+            cache.set("a", 1)
+        with patch("src.tools.bm25_search.time.monotonic", return_value=5.0):
+            assert cache.get("a") == 1
+        with patch("src.tools.bm25_search.time.monotonic", return_value=10.0):
+            assert cache.get("a") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = bm25_search._TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestBM25ServiceTools:
+    @patch("src.tools.bm25_search._get_session")
+    def test_health_check(self, mock_get_session):
+        mock_get_session.return_value.get.return_value = _response(
+            {"status": "ok", "documents_count": 10, "vocabulary_size": 200}
+        )
+
+        result = bm25_health_check_tool.invoke({"server_url": "http://bm25:5003"})
+
+        mock_get_session.return_value.get.assert_called_once_with(
+            "http://bm25:5003/health", timeout=5
+        )
+        assert "文档数: 10" in result
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_health_check_caches_failures(self, mock_get_session):
+        mock_get_session.return_value.get.side_effect = (
+            requests.exceptions.ConnectionError("refused")
+        )
+
+        first = bm25_health_check_tool.invoke({"server_url": "http://bm25:5003"})
+        second = bm25_health_check_tool.invoke({"server_url": "http://bm25:5003"})
+
+        assert first == second
+        assert first.startswith("❌ BM25服务状态检查失败")
+        mock_get_session.return_value.get.assert_called_once()
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_health_check_cache_expires(self, mock_get_session):
+        mock_get_session.return_value.get.return_value = _response(
+            {"documents_count": 10, "vocabulary_size": 200}
+        )
+
+        with patch("src.tools.bm25_search.time.monotonic", return_value=0.0):
+            bm25_health_check_tool.invoke({"server_url": "http://bm25:5003"})
+        with patch("src.tools.bm25_search.time.monotonic", return_value=6.0):
+            bm25_health_check_tool.invoke({"server_url": "http://bm25:5003"})
+
+        assert mock_get_session.return_value.get.call_count == 2
+
+    @patch("src.tools.bm25_search._get_session")
+    def test_stats(self, mock_get_session):
+        mock_get_session.return_value.get.return_value = _response(
+            {
+                "statistics": {
+                    "documents_count": 10,
+                    "vocabulary_size": 200,
+                    "average_document_length": 12.34,
+                    "top_terms": [{"term": "藕汤", "frequency": 3}],
+                }
+            }
+        )
+
+        result = bm25_stats_tool.invoke({"server_url": "http://bm25:5003"})
+
+        assert "平均文档长度: 12.3" in result
+        assert "藕汤: 3 次" in result
+
+
+class TestBM25StaticText:
+    def test_search_tool_description(self):
+        assert bm25_search_tool.description == bm25_search.BM25_SEARCH_DESCRIPTION
+        assert "菜品SOP" in bm25_search_tool.description
+
+    def test_database_info_returns_shared_constant(self):
+        result = bm25_search.bm25_database_info_tool.invoke({})
+        assert result == bm25_search._DB_INFO
+
+    def test_tools_use_explicit_schemas(self):
+        assert bm25_search_tool.args_schema is bm25_search.BM25SearchInput
+        for tool in (
+            bm25_health_check_tool,
+            bm25_stats_tool,
+            bm25_search.bm25_database_info_tool,
+        ):
+            assert tool.args_schema is bm25_search.BM25ServerInput
+        assert bm25_health_check_tool.name == "bm25_health_check_tool"
+        assert bm25_health_check_tool.description.startswith("Check the health")
@@ -1,9 +1,12 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import inspect
 from unittest.mock import Mock, call, patch
 
-from src.tools.decorators import create_logged_tool
+import pytest
+
+from src.tools.decorators import create_logged_tool, log_io
 
 
 class MockBaseTool:
@@ -117,3 +120,39 @@ class TestLoggedToolMixin:
             call_args = mock_debug.call_args[0][0]
             assert "Tool MockBaseTool returned:" in call_args
             assert "LoggedMockBaseTool" not in call_args
+
+
+class TestLogIo:
+    def test_sync_function_logs_input_and_output(self):
+        @log_io
+        def add(a, b=0):
+            return a + b
+
+        with patch("src.tools.decorators.logger.info") as mock_info:
+            assert add(1, b=2) == 3
+
+        mock_info.assert_has_calls(
+            [
+                call("Tool add called with parameters: 1, b=2"),
+                call("Tool add returned: 3"),
+            ]
+        )
+
+    @pytest.mark.asyncio
+    async def test_async_function_stays_awaitable_and_logs(self):
+        @log_io
+        async def add(a, b=0):
+            return a + b
+
+        assert inspect.iscoroutinefunction(add)
+        assert add.__name__ == "add"
+
+        with patch("src.tools.decorators.logger.info") as mock_info:
+            assert await add(1, b=2) == 3
+
+        mock_info.assert_has_calls(
+            [
+                call("Tool add called with parameters: 1, b=2"),
+                call("Tool add returned: 3"),
+            ]
+        )
@@ -3,7 +3,7 @@
 
 import json
 
-from src.utils.json_utils import repair_json_output
+from src.utils.json_utils import repair_json_output, sanitize_args
 
 
 class TestRepairJsonOutput:
@@ -106,3 +106,16 @@ class TestRepairJsonOutput:
         # Should attempt to process as JSON since it contains ```json
         assert isinstance(result, str)
         assert result == '{"key": "value"}'
+
+
+class TestSanitizeArgs:
+    def test_escapes_brackets_and_braces(self):
+        result = sanitize_args('{"items": [1, 2]}')
+        assert result == '&#123;"items": &#91;1, 2&#93;&#125;'
+
+    def test_plain_string_unchanged(self):
+        assert sanitize_args('"query": "藕汤"') == '"query": "藕汤"'
+
+    def test_non_string_returns_empty(self):
+        assert sanitize_args(None) == ""
+        assert sanitize_args({"key": "value"}) == ""
@@ -0,0 +1,286 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+import src.utils.request_logger as request_logger_module
+from src.utils.request_logger import (
+    DEFAULT_MAX_CONTENT_CHARS,
+    RequestLogger,
+    _project_messages,
+    _tail_lines,
+    fast_now,
+    get_request_logger,
+)
+
+
+@pytest.fixture
+def request_logger(tmp_path):
+    request_logger = RequestLogger(log_dir=str(tmp_path / "requests"))
+    yield request_logger
+    request_logger.close()
+
+
+class TestFastNow:
+    def test_matches_isoformat(self):
+        ns = 1_700_000_000_123_456_789
+        with patch("src.utils.request_logger.time.time_ns", return_value=ns):
+            result = fast_now()
+
+        expected = datetime.fromtimestamp(1_700_000_000).replace(microsecond=123456)
+        assert result == expected.isoformat()
+
+    def test_keeps_microseconds_when_zero(self):
+        with patch(
+            "src.utils.request_logger.time.time_ns",
+            return_value=1_700_000_001_000_000_000,
+        ):
+            result = fast_now()
+
+        assert result.endswith(".000000")
+
+    def test_reformats_when_second_changes(self):
+        with patch(
+            "src.utils.request_logger.time.time_ns",
+            side_effect=[1_700_000_000_000_000_000, 1_700_000_001_000_000_000],
+        ):
+            first = fast_now()
+            second = fast_now()
+
+        assert first[:19] != second[:19]
+
+
+class TestRequestLogger:
+    def test_log_request_writes_entry(self, request_logger):
+        request_id = request_logger.log_request(
+            thread_id="t1",
+            user_query="藕汤怎么做",
+            messages=[{"role": "user", "content": "藕汤怎么做"}],
+        )
+
+        entries = request_logger.read_logs()
+        assert len(entries) == 1
+        assert entries[0]["request_id"] == request_id
+        assert entries[0]["type"] == "request"
+        assert entries[0]["user_query"] == "藕汤怎么做"
+        assert request_id.startswith("t1_")
+
+    def test_request_ids_unique_under_burst(self, request_logger):
+        ids = {request_logger.log_request("t1", "q", []) for _ in range(50)}
+        assert len(ids) == 50
+
+    def test_log_entries_share_request_id(self, request_logger):
+        request_id = request_logger.log_request("t1", "q", [])
+        request_logger.log_prompt(request_id, "researcher", "prompt")
+        request_logger.log_response(request_id, "done")
+        request_logger.log_error(request_id, "boom")
+
+        entries = request_logger.read_logs()
+        assert [e["type"] for e in entries] == [
+            "request",
+            "prompt",
+            "response",
+            "error",
+        ]
+        assert {e["request_id"] for e in entries} == {request_id}
+
+    def test_read_logs_missing_file(self, request_logger, tmp_path):
+        assert request_logger.read_logs(log_file=tmp_path / "missing.jsonl") == []
+
+    def test_concurrent_writes_are_all_flushed(self, request_logger):
+        def write(n):
+            for i in range(50):
+                request_logger.log_prompt(f"r{n}", "researcher", f"prompt {i}")
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert request_logger.flush()
+        lines = request_logger.current_log_file.read_text(encoding="utf-8")
+        assert len(lines.splitlines()) == 200
+
+    def test_close_writes_pending_entries(self, tmp_path):
+        request_logger = RequestLogger(log_dir=str(tmp_path / "requests"))
+        request_logger.log_response("r1", "done")
+        request_logger.close()
+
+        assert not request_logger._writer.is_alive()
+        assert "done" in request_logger.current_log_file.read_text(encoding="utf-8")
+
+    def test_entries_after_close_are_dropped(self, tmp_path):
+        request_logger = RequestLogger(log_dir=str(tmp_path / "requests"))
+        request_logger.close()
+        request_logger.log_response("r1", "done")
+
+        assert request_logger.read_logs() == []
+
+    def test_non_ascii_is_written_unescaped(self, request_logger):
+        request_logger.log_prompt("r1", "researcher", "筒骨煨藕汤")
+        request_logger.flush()
+
+        raw = request_logger.current_log_file.read_bytes()
+        assert "筒骨煨藕汤".encode("utf-8") in raw
+        assert raw.endswith(b"\n")
+
+    def test_values_orjson_rejects_fall_back_to_json(self, request_logger):
+        request_logger.log_prompt("r1", "researcher", "p", {"big": 2**70})
+        request_logger.flush()
+
+        raw = request_logger.current_log_file.read_text(encoding="utf-8")
+        assert json.loads(raw)["metadata"] == {"big": 2**70}
+
+    def test_log_file_is_only_checked_when_hour_changes(self, request_logger):
+        assert request_logger._ensure_log_file_exists("2099-01-31T23")
+        assert not request_logger._ensure_log_file_exists("2099-01-31T23")
+        assert request_logger._ensure_log_file_exists("2099-02-01T00")
+
+        expected = request_logger.log_dir / "2099" / "02" / "01" / "00.jsonl"
+        assert request_logger.current_log_file == expected
+        assert expected.exists()
+
+    def test_entry_is_written_to_the_hour_of_its_timestamp(self, request_logger):
+        current = request_logger.current_log_file
+        request_logger._write_log_entry(
+            {"request_id": "late", "timestamp": "2025-10-16T13:59:59.900000"}
+        )
+
+        entries = request_logger.read_logs(
+            start=datetime(2025, 10, 16, 13), end=datetime(2025, 10, 16, 13, 59, 59)
+        )
+        assert [e["request_id"] for e in entries] == ["late"]
+        # 写入较早小时的条目不会让当前日志文件倒退
+        assert request_logger.current_log_file == current
+
+    def test_read_logs_tail_returns_last_entries(self, request_logger):
+        for i in range(10):
+            request_logger.log_prompt(f"r{i}", "researcher", "p")
+
+        head = request_logger.read_logs(limit=3)
+        tail = request_logger.read_logs(limit=3, tail=True)
+
+        assert [e["request_id"] for e in head] == ["r0", "r1", "r2"]
+        assert [e["request_id"] for e in tail] == ["r7", "r8", "r9"]
+
+    def test_read_logs_across_hourly_shards(self, request_logger):
+        log_dir = request_logger.log_dir
+        for hour, ids in ((9, ["a", "b"]), (11, ["c", "d"])):
+            shard = log_dir / "2025" / "10" / "16" / f"{hour:02d}.jsonl"
+            shard.parent.mkdir(parents=True, exist_ok=True)
+            shard.write_text(
+                "".join(json.dumps({"request_id": i}) + "\n" for i in ids)
+            )
+
+        start = datetime(2025, 10, 16, 8, 30)
+        end = datetime(2025, 10, 16, 12)
+        assert len(request_logger.get_shards(start, end)) == 2
+
+        entries = request_logger.read_logs(start=start, end=end)
+        assert [e["request_id"] for e in entries] == ["a", "b", "c", "d"]
+        head = request_logger.read_logs(limit=3, start=start, end=end)
+        assert [e["request_id"] for e in head] == ["a", "b", "c"]
+        tail = request_logger.read_logs(limit=3, tail=True, start=start, end=end)
+        assert [e["request_id"] for e in tail] == ["b", "c", "d"]
+        later = request_logger.read_logs(start=datetime(2025, 10, 16, 10), end=end)
+        assert [e["request_id"] for e in later] == ["c", "d"]
+
+    def test_entry_is_captured_at_log_time(self, request_logger):
+        metadata = {"step": 1}
+        request_logger.log_prompt("r1", "researcher", "p", metadata)
+        metadata["step"] = 2
+
+        assert request_logger.read_logs()[0]["metadata"] == {"step": 1}
+
+    def test_unserializable_entry_is_skipped(self, request_logger):
+        request_logger.log_prompt("r1", "researcher", "p", {"bad": object()})
+        request_logger.log_prompt("r2", "researcher", "p")
+
+        assert [e["request_id"] for e in request_logger.read_logs()] == ["r2"]
+
+
+class TestProjectMessages:
+    def test_truncates_long_content(self):
+        messages = [{"role": "user", "content": "a" * 10, "extra": "dropped"}]
+
+        assert _project_messages(messages, max_chars=4) == [
+            {"role": "user", "content": "aaaa", "truncated": True}
+        ]
+
+    def test_keeps_only_text_parts(self):
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "这道菜"},
+                    {"type": "image", "image_url": "data:image/png;base64,AAAA"},
+                ],
+            }
+        ]
+
+        assert _project_messages(messages, max_chars=100) == [
+            {"role": "user", "content": "这道菜"}
+        ]
+
+    def test_log_request_uses_configured_cap(self, tmp_path):
+        request_logger = RequestLogger(
+            log_dir=str(tmp_path / "requests"), max_content_chars=3
+        )
+        try:
+            request_logger.log_request(
+                "t1", "q", [{"role": "user", "content": "abcdef"}]
+            )
+            entry = request_logger.read_logs()[0]
+        finally:
+            request_logger.close()
+
+        assert entry["messages"] == [
+            {"role": "user", "content": "abc", "truncated": True}
+        ]
+
+
+class TestGetRequestLogger:
+    @pytest.fixture(autouse=True)
+    def reset_singleton(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("REQUEST_LOG_DIR", str(tmp_path / "requests"))
+        monkeypatch.setattr(request_logger_module, "_request_logger", None)
+        yield
+        if request_logger_module._request_logger is not None:
+            request_logger_module._request_logger.close()
+
+    def test_invalid_max_content_falls_back_to_default(self, monkeypatch):
+        monkeypatch.setenv("REQUEST_LOG_MAX_CONTENT", "lots")
+
+        assert get_request_logger().max_content_chars == DEFAULT_MAX_CONTENT_CHARS
+
+    def test_max_content_is_at_least_one(self, monkeypatch):
+        monkeypatch.setenv("REQUEST_LOG_MAX_CONTENT", "0")
+
+        assert get_request_logger().max_content_chars == 1
+
+
+class TestTailLines:
+    def test_returns_last_lines(self, tmp_path):
+        path = tmp_path / "log.jsonl"
+        path.write_bytes(b"".join(b'{"i":%d}\n' % i for i in range(100)))
+
+        assert _tail_lines(path, 2) == [b'{"i":98}', b'{"i":99}']
+
+    def test_returns_whole_file_when_shorter_than_n(self, tmp_path):
+        path = tmp_path / "log.jsonl"
+        path.write_bytes(b"a\n\nb")
+
+        assert _tail_lines(path, 5) == [b"a", b"b"]
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "log.jsonl"
+        path.write_bytes(b"")
+
+        assert _tail_lines(path, 5) == []
+
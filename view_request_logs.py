@@ -8,75 +8,219 @@
 """
 
 import argparse
+import io
+import itertools
 import json
+import mmap
 import os
 import sys
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # 没有安装 orjson 时退回标准库
+    orjson = None
+    _loads = json.loads
 
-def load_logs(log_dir: str = "logs/requests", limit: int = None) -> List[Dict[str, Any]]:
-    """
-    加载日志文件
-    
-    Args:
-        log_dir: 日志目录
-        limit: 限制读取的条目数
-    
-    Returns:
-        日志条目列表
-    """
+
+# 加载时缓存的原始 UTF-8 行，供全文搜索直接做字节查找，只在内存中使用，导出时去除
+SEARCH_BLOB_KEY = "_search_blob"
+
+
+# 条目时间戳解析后的 epoch 秒缓存，只在内存中使用，导出时去除
+TS_EPOCH_KEY = "_ts_epoch"
+
+
+def _entry_epoch(entry: Dict[str, Any]) -> Optional[float]:
+    """返回条目时间戳的 epoch 秒，每个条目只解析一次；无法解析时返回 None"""
+    try:
+        return entry[TS_EPOCH_KEY]
+    except KeyError:
+        pass
+    try:
+        epoch = datetime.fromisoformat(entry.get("timestamp", "")).timestamp()
+    except (TypeError, ValueError):
+        epoch = None
+    entry[TS_EPOCH_KEY] = epoch
+    return epoch
+
+
+def _search_blob(entry: Dict[str, Any]) -> bytes:
+    """返回条目的原始 JSON 行，没有缓存时现场序列化"""
+    blob = entry.get(SEARCH_BLOB_KEY)
+    if blob is None:
+        blob = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+    return blob
+
+
+def _strip_private(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉加载时附加的内部字段"""
+    return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+
+def _log_file_sort_key(log_path: Path, log_file: Path) -> str:
+    """把小时分片和旧版按月文件映射为可比较的 YYYY/MM[/DD/HH] 字符串"""
+    if log_file.name.startswith("requests_"):
+        return log_file.stem[len("requests_"):].replace("_", "/")
+    return log_file.relative_to(log_path).with_suffix("").as_posix()
+
+
+def _iter_mmap_lines(log_file: Path) -> Iterator[bytes]:
+    """内存映射日志文件，按换行符切分产出原始字节行"""
+    with open(log_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0
+            while start < size:
+                end = mm.find(b"\n", start)
+                if end == -1:
+                    end = size
+                yield mm[start:end]
+                start = end + 1
+
+
+def _iter_mmap_lines_reversed(log_file: Path) -> Iterator[bytes]:
+    """内存映射日志文件，从末尾反向查找换行符，从后往前产出原始字节行"""
+    with open(log_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            while end > 0:
+                newline = mm.rfind(b"\n", 0, end)
+                yield mm[newline + 1:end]
+                end = max(newline, 0)
+
+
+def _iter_log_file(log_file: Path, reverse: bool = False) -> Iterator[Dict[str, Any]]:
+    """逐条解析单个日志文件；reverse 为 True 时从文件末尾往前读"""
+    try:
+        # 内存映射读取，原始字节行直接交给 JSON 解析，省去文本解码
+        lines = _iter_mmap_lines_reversed(log_file) if reverse else _iter_mmap_lines(log_file)
+        for line in lines:
+            if line.strip():
+                try:
+                    entry = _loads(line)
+                except ValueError as e:
+                    print(f"⚠️  解析失败: {e}")
+                    continue
+                # 原始行即条目的 JSON 序列化，缓存供全文搜索复用（加载时不做小写转换）
+                entry[SEARCH_BLOB_KEY] = line
+                yield entry
+    except Exception as e:
+        print(f"❌ 读取文件失败 {log_file}: {e}")
+
+
+def _find_log_files(log_dir: str) -> Optional[Tuple[Path, List[Path]]]:
+    """查找日志目录下的所有日志文件，最新的在前；找不到时打印提示并返回 None"""
     log_path = Path(log_dir)
     if not log_path.exists():
         print(f"❌ 日志目录不存在: {log_dir}")
-        return []
+        return None
     
-    # 获取所有日志文件，按时间排序
-    log_files = sorted(log_path.glob("requests_*.jsonl"), reverse=True)
+    # 获取所有日志文件（小时分片 YYYY/MM/DD/HH.jsonl 和旧版按月文件），最新的在前
+    log_files = sorted(
+        [*log_path.glob("*/*/*/*.jsonl"), *log_path.glob("requests_*.jsonl")],
+        key=lambda p: _log_file_sort_key(log_path, p),
+        reverse=True,
+    )
     
     if not log_files:
         print(f"❌ 没有找到日志文件: {log_dir}")
-        return []
+        return None
     
     print(f"📁 找到 {len(log_files)} 个日志文件")
+    return log_path, log_files
+
+
+def iter_logs(log_dir: str = "logs/requests") -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取日志文件，按文件从新到旧产出条目，不在内存中保留全部日志
+    
+    Args:
+        log_dir: 日志目录
+    
+    Yields:
+        日志条目
+    """
+    found = _find_log_files(log_dir)
+    if found is None:
+        return
+    log_path, log_files = found
     
-    entries = []
     for log_file in log_files:
-        print(f"📄 读取: {log_file.name}")
-        try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            entry = json.loads(line)
-                            entries.append(entry)
-                            
-                            if limit and len(entries) >= limit:
-                                return entries
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  解析失败: {e}")
-                            continue
-        except Exception as e:
-            print(f"❌ 读取文件失败 {log_file}: {e}")
+        print(f"📄 读取: {log_file.relative_to(log_path)}")
+        yield from _iter_log_file(log_file)
+
+
+def tail_logs(log_dir: str = "logs/requests", limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    读取最新的 limit 条日志
+    
+    从最新的文件末尾反向查找换行符，读取量与 limit 成正比，与文件大小无关；
+    最新文件不足 limit 条时继续读取较旧的文件
+    
+    Args:
+        log_dir: 日志目录
+        limit: 读取的条目数
+    
+    Returns:
+        日志条目列表，顺序与 iter_logs 一致（文件从新到旧，文件内按写入顺序）
+    """
+    found = _find_log_files(log_dir)
+    if found is None:
+        return []
+    log_path, log_files = found
     
+    entries = []
+    for log_file in log_files:
+        remaining = limit - len(entries)
+        if remaining <= 0:
+            break
+        print(f"📄 读取: {log_file.relative_to(log_path)}")
+        # 反向读到够数即停，再恢复文件内的写入顺序
+        newest = list(itertools.islice(_iter_log_file(log_file, reverse=True), remaining))
+        newest.reverse()
+        entries.extend(newest)
     return entries
 
 
+def load_logs(log_dir: str = "logs/requests", limit: int = None) -> List[Dict[str, Any]]:
+    """
+    加载日志文件
+    
+    Args:
+        log_dir: 日志目录
+        limit: 只读取最新的 limit 条；不限制时读取全部日志
+    
+    Returns:
+        日志条目列表
+    """
+    if limit is not None:
+        return tail_logs(log_dir, limit)
+    return list(iter_logs(log_dir))
+
+
 def filter_logs(
-    entries: List[Dict[str, Any]],
+    entries: Iterable[Dict[str, Any]],
     log_type: str = None,
     request_id: str = None,
     thread_id: str = None,
     start_date: str = None,
     end_date: str = None,
     search_text: str = None,
-) -> List[Dict[str, Any]]:
+) -> Iterator[Dict[str, Any]]:
     """
-    筛选日志条目
+    筛选日志条目（惰性求值，边读边筛）
     
     Args:
-        entries: 日志条目列表
+        entries: 日志条目（列表或迭代器）
         log_type: 日志类型 (request/prompt/response/error)
         request_id: 请求ID
         thread_id: 线程ID
@@ -85,116 +229,141 @@ def filter_logs(
         search_text: 搜索文本
     
     Returns:
-        筛选后的日志条目列表
+        筛选后的日志条目迭代器
     """
-    filtered = entries
+    filtered = iter(entries)
     
     if log_type:
-        filtered = [e for e in filtered if e.get("type") == log_type]
+        filtered = (e for e in filtered if e.get("type") == log_type)
     
     if request_id:
-        filtered = [e for e in filtered if e.get("request_id") == request_id]
+        filtered = (e for e in filtered if e.get("request_id") == request_id)
     
     if thread_id:
-        filtered = [e for e in filtered if e.get("thread_id") == thread_id]
+        filtered = (e for e in filtered if e.get("thread_id") == thread_id)
     
+    # 时间范围比较使用 epoch 浮点数：边界只解析一次，条目时间戳解析后缓存
     if start_date:
-        start = datetime.fromisoformat(start_date)
-        filtered = [
+        start = datetime.fromisoformat(start_date).timestamp()
+        filtered = (
             e for e in filtered
-            if datetime.fromisoformat(e.get("timestamp", "")) >= start
-        ]
+            if (ts := _entry_epoch(e)) is not None and ts >= start
+        )
     
     if end_date:
-        end = datetime.fromisoformat(end_date)
-        filtered = [
+        end = datetime.fromisoformat(end_date).timestamp()
+        filtered = (
             e for e in filtered
-            if datetime.fromisoformat(e.get("timestamp", "")) <= end
-        ]
+            if (ts := _entry_epoch(e)) is not None and ts <= end
+        )
     
     if search_text:
-        search_lower = search_text.lower()
-        filtered = [
-            e for e in filtered
-            if search_lower in json.dumps(e, ensure_ascii=False).lower()
-        ]
+        needle = search_text.lower().encode("utf-8")
+        if needle == needle.upper():
+            # 不含 ASCII 字母（如纯中文）时大小写不影响匹配，直接在原始行上查找
+            filtered = (e for e in filtered if needle in _search_blob(e))
+        else:
+            filtered = (e for e in filtered if needle in _search_blob(e).lower())
     
     return filtered
 
 
-def format_entry(entry: Dict[str, Any], verbose: bool = False) -> str:
+def _preview(text: str, limit: int) -> str:
+    """超过 limit 个字符时截断并加省略号"""
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def write_entry(entry: Dict[str, Any], out: TextIO, verbose: bool = False) -> None:
     """
-    格式化单个日志条目
+    格式化单个日志条目并直接写入输出流（每行以换行结尾），不构造中间字符串
     
     Args:
         entry: 日志条目
+        out: 输出流，如 sys.stdout
         verbose: 是否显示详细信息
-    
-    Returns:
-        格式化的字符串
     """
+    write = out.write
+
+    def emit(text: str) -> None:
+        write(text)
+        write("\n")
+
     entry_type = entry.get("type", "unknown")
     timestamp = entry.get("timestamp", "")
     request_id = entry.get("request_id", "")
     
-    lines = []
-    lines.append("=" * 80)
-    lines.append(f"类型: {entry_type.upper()} | 时间: {timestamp}")
-    lines.append(f"请求ID: {request_id}")
+    emit("=" * 80)
+    emit(f"类型: {entry_type.upper()} | 时间: {timestamp}")
+    emit(f"请求ID: {request_id}")
     
     if entry_type == "request":
-        lines.append(f"线程ID: {entry.get('thread_id', '')}")
-        lines.append(f"用户问题: {entry.get('user_query', '')}")
+        emit(f"线程ID: {entry.get('thread_id', '')}")
+        emit(f"用户问题: {entry.get('user_query', '')}")
         
         if verbose:
-            lines.append("\n消息列表:")
+            emit("\n消息列表:")
             for msg in entry.get("messages", []):
-                lines.append(f"  - {msg.get('role', '')}: {msg.get('content', '')[:100]}...")
+                emit(f"  - {msg.get('role', '')}: {msg.get('content', '')[:100]}...")
             
-            lines.append("\n元数据:")
-            lines.append(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
+            emit("\n元数据:")
+            emit(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
     
     elif entry_type == "prompt":
-        lines.append(f"Agent: {entry.get('agent_name', '')}")
+        emit(f"Agent: {entry.get('agent_name', '')}")
         prompt = entry.get("prompt", "")
-        lines.append(f"\nPrompt ({len(prompt)} 字符):")
+        emit(f"\nPrompt ({len(prompt)} 字符):")
         if verbose:
-            lines.append(prompt)
+            emit(prompt)
         else:
-            lines.append(prompt[:200] + "..." if len(prompt) > 200 else prompt)
+            emit(_preview(prompt, 200))
         
         if verbose and entry.get("metadata"):
-            lines.append("\n元数据:")
-            lines.append(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
+            emit("\n元数据:")
+            emit(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
     
     elif entry_type == "response":
         final_result = entry.get("final_result", "")
-        lines.append(f"\n最终结果 ({len(final_result)} 字符):")
+        emit(f"\n最终结果 ({len(final_result)} 字符):")
         if verbose:
-            lines.append(final_result)
+            emit(final_result)
         else:
-            lines.append(final_result[:300] + "..." if len(final_result) > 300 else final_result)
+            emit(_preview(final_result, 300))
         
         if verbose:
             intermediate = entry.get("intermediate_results", [])
             if intermediate:
-                lines.append(f"\n中间结果 ({len(intermediate)} 条):")
+                emit(f"\n中间结果 ({len(intermediate)} 条):")
                 for i, result in enumerate(intermediate, 1):
-                    lines.append(f"  {i}. Agent: {result.get('agent', '')}")
-                    lines.append(f"     内容: {result.get('content', '')[:100]}...")
+                    emit(f"  {i}. Agent: {result.get('agent', '')}")
+                    emit(f"     内容: {result.get('content', '')[:100]}...")
             
-            lines.append("\n元数据:")
-            lines.append(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
+            emit("\n元数据:")
+            emit(json.dumps(entry.get("metadata", {}), ensure_ascii=False, indent=2))
     
     elif entry_type == "error":
-        lines.append(f"错误消息: {entry.get('error_message', '')}")
+        emit(f"错误消息: {entry.get('error_message', '')}")
         
         if verbose and entry.get("error_details"):
-            lines.append("\n错误详情:")
-            lines.append(json.dumps(entry.get("error_details", {}), ensure_ascii=False, indent=2))
+            emit("\n错误详情:")
+            emit(json.dumps(entry.get("error_details", {}), ensure_ascii=False, indent=2))
     
-    lines.append("=" * 80)
-    return "\n".join(lines)
+    emit("=" * 80)
+
+
+def format_entry(entry: Dict[str, Any], verbose: bool = False) -> str:
+    """
+    格式化单个日志条目
+    
+    Args:
+        entry: 日志条目
+        verbose: 是否显示详细信息
+    
+    Returns:
+        格式化的字符串
+    """
+    buf = io.StringIO()
+    write_entry(entry, buf, verbose)
+    return buf.getvalue()[:-1]
 
 
 def export_logs(entries: List[Dict[str, Any]], output_file: str):
@@ -205,27 +374,32 @@ def export_logs(entries: List[Dict[str, Any]], output_file: str):
         entries: 日志条目列表
         output_file: 输出文件路径
     """
+    data = [_strip_private(e) for e in entries]
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # orjson 直接生成 UTF-8 字节，整体一次写入
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"✅ 已导出 {len(entries)} 条日志到: {output_file}")
     except Exception as e:
         print(f"❌ 导出失败: {e}")
 
 
-def print_summary(entries: List[Dict[str, Any]]):
+def print_summary(entries: Iterable[Dict[str, Any]]) -> int:
     """
-    打印日志摘要统计
+    打印日志摘要统计（单次遍历，可直接消费迭代器）
     
     Args:
-        entries: 日志条目列表
-    """
-    total = len(entries)
-    type_counts = {}
+        entries: 日志条目
     
-    for entry in entries:
-        entry_type = entry.get("type", "unknown")
-        type_counts[entry_type] = type_counts.get(entry_type, 0) + 1
+    Returns:
+        统计的条目总数
+    """
+    type_counts = Counter(entry.get("type", "unknown") for entry in entries)
+    total = sum(type_counts.values())
     
     print("\n" + "=" * 80)
     print("日志摘要")
@@ -236,6 +410,7 @@ def print_summary(entries: List[Dict[str, Any]]):
         percentage = (count / total * 100) if total > 0 else 0
         print(f"  {entry_type.ljust(15)}: {count:5d} ({percentage:5.1f}%)")
     print("=" * 80)
+    return total
 
 
 def main():
@@ -272,7 +447,7 @@ def main():
     parser.add_argument(
         "--limit",
         type=int,
-        help="限制读取的日志条目数"
+        help="限制输出的日志条目数（在筛选之后生效；不筛选时直接读取最新的N条）"
     )
     parser.add_argument(
         "--type",
@@ -316,18 +491,16 @@ def main():
     
     args = parser.parse_args()
     
-    # 加载日志
+    # 读取并筛选日志：流水线逐条处理，--limit 在筛选之后生效
     print("📖 正在加载日志...")
-    entries = load_logs(log_dir=args.log_dir, limit=args.limit)
-    
-    if not entries:
-        print("没有找到日志条目")
-        sys.exit(1)
-    
-    print(f"✅ 加载了 {len(entries)} 条日志\n")
-    
-    # 筛选日志
-    if any([args.type, args.request_id, args.thread_id, args.start_date, args.end_date, args.search]):
+    has_filter = any([args.type, args.request_id, args.thread_id, args.start_date, args.end_date, args.search])
+    if args.limit is not None and not has_filter:
+        # 只看最新的N条：从文件末尾反向读取，不扫描整个文件
+        entries = iter(tail_logs(log_dir=args.log_dir, limit=args.limit))
+    else:
+        entries = iter_logs(log_dir=args.log_dir)
+    
+    if has_filter:
         print("🔍 正在筛选日志...")
         entries = filter_logs(
             entries,
@@ -338,13 +511,22 @@ def main():
             end_date=args.end_date,
             search_text=args.search,
         )
-        print(f"✅ 筛选后剩余 {len(entries)} 条日志\n")
     
-    # 显示摘要
+    entries = itertools.islice(entries, args.limit)
+    first = next(entries, None)
+    if first is None:
+        print("没有找到日志条目")
+        sys.exit(1)
+    entries = itertools.chain([first], entries)
+    
+    # 显示摘要：单次遍历统计，不保留条目
     if args.summary:
         print_summary(entries)
         sys.exit(0)
     
+    entries = list(entries)
+    print(f"✅ 共 {len(entries)} 条日志\n")
+    
     # 导出日志
     if args.export:
         export_logs(entries, args.export)
@@ -354,9 +536,15 @@ def main():
     print_summary(entries)
     print("\n详细日志:\n")
     
+    # 大量输出时改用块缓冲，避免终端下逐行刷新；循环内用到的属性提前取到局部变量
+    out = sys.stdout
+    if isinstance(out, io.TextIOWrapper):
+        out.reconfigure(line_buffering=False)
+    write = out.write
+    verbose = args.verbose
     for entry in entries:
-        print(format_entry(entry, verbose=args.verbose))
-        print()
+        write_entry(entry, out, verbose)
+        write("\n")
 
 
 if __name__ == "__main__":